@@ -1,12 +1,18 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import time
+import uuid
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.revocation import revocation_list, user_revocation_key
 from app.modules.user.models.user import User, AccountStatus
 from app.utils.logger import get_logger
+from app.utils.cache import TTLCache
+from app.utils.metrics import register_metrics
 import os
 
 logger = get_logger("auth.py")
@@ -15,10 +21,23 @@ logger = get_logger("auth.py")
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
 
 # JWT token scheme
 security = HTTPBearer()
 
+# Resolved users keyed by the token's "sub", so protected routes skip the users lookup.
+# Entries are detached from their session and must be invalidated whenever a user changes.
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+register_metrics("user_cache", user_cache.stats)
+
+# Decoded claims keyed by the token digest; each entry expires with the token's own exp
+token_cache = TTLCache(maxsize=TOKEN_CACHE_MAX_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+register_metrics("token_cache", token_cache.stats)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -27,25 +46,74 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # A float iat keeps sub-second precision for comparing with blanket revocations
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify a JWT token and return the user ID"""
+def create_refresh_token(data: dict):
+    """Create a long-lived JWT that can only be exchanged for new access tokens"""
+    return create_access_token(
+        {**data, "type": "refresh"}, expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+
+def revoke_token(db: Session, claims: dict) -> None:
+    """Revoke a single token until it would have expired anyway"""
+    if claims.get("jti") is None:
+        return
+    revocation_list.revoke(
+        db, claims["jti"], claims.get("sub"), datetime.utcfromtimestamp(claims["exp"])
+    )
+
+def revoke_user_tokens(db: Session, user_id: str) -> None:
+    """Revoke every token issued to a user so far, e.g. on suspension"""
+    revocation_list.revoke(
+        db, user_revocation_key(user_id), user_id,
+        datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+
+def decode_token(token: str) -> Optional[dict]:
+    """Verify a JWT token and return its claims, skipping verification for tokens seen before"""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-        return user_id
     except JWTError:
         return None
+    exp = payload.get("exp")
+    if exp is not None:
+        token_cache.set(key, payload, ttl=exp - time.time())
+    return payload
+
+def verify_token(token: str) -> Optional[str]:
+    """Verify a JWT token and return the user ID"""
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    return payload.get("sub")
 
 def get_user_by_id(db: Session, user_id: str) -> Optional[User]:
     """Get user by ID (moved here to avoid circular import)"""
     return db.query(User).filter(User.userid == user_id).first()
 
+def get_cached_user(db: Session, user_id: str) -> Optional[User]:
+    """Get user by ID through the in-process user cache"""
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    user = get_user_by_id(db, user_id)
+    if user is not None:
+        # Detach so a later commit on this session can't expire the shared instance
+        db.expunge(user)
+        user_cache.set(user_id, user)
+    return user
+
+def invalidate_cached_user(user_id: str) -> None:
+    """Drop a user from the cache after it has been changed or deleted"""
+    user_cache.pop(user_id)
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -57,15 +125,16 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        token = credentials.credentials
-        user_id = verify_token(token)
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    payload = decode_token(credentials.credentials)
+    if payload is None or payload.get("sub") is None:
+        raise credentials_exception
+    # Refresh tokens are only accepted by /users/token/refresh
+    if payload.get("type") == "refresh":
+        raise credentials_exception
+    if revocation_list.is_revoked(db, payload):
         raise credentials_exception
     
-    user = get_user_by_id(db, user_id)
+    user = get_cached_user(db, payload["sub"])
     if user is None:
         raise credentials_exception
     
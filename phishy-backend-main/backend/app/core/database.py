@@ -1,5 +1,6 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -46,12 +47,84 @@ def get_db():
         db.close()
 
 
+def dialect_insert(db, model):
+    """insert() for the session's dialect, so callers can use on_conflict_do_update/nothing"""
+    name = db.bind.dialect.name
+    if name == "postgresql":
+        return postgresql.insert(model)
+    if name == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upserts are not supported on {name}")
+
+
 def init_db():
     # Import all models here so they are registered with Base
     # This import must be inside the function to avoid circular imports
     from app.modules.user.models.user import User
+    from app.modules.user.models.token import RevokedToken
+    from app.modules.user.models.stats import UserStatsSummary
     from app.modules.learning_path.models.learn_path import UserLearnPath
-    from app.modules.game.models.game import GameProgress, GameScore
+    from app.modules.game.models.game import GameProgress, GameScore, UserBestScore, ScoreBucket
+    from app.modules.game.models.assessment import AssessmentSession, AssessmentResult, UserAssessmentStats
 
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _dedupe_game_progress()
+    # create_all only adds indexes together with new tables, so add any declared since
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    _drop_replaced_indexes()
     logger.info("✅ Database tables created successfully.")
+
+
+# Indexes superseded by wider ones declared on the models, per table
+REPLACED_INDEXES = {
+    "assessment_sessions": ["ix_assessment_sessions_session_id_user_id"],
+}
+
+
+def _drop_replaced_indexes():
+    """Drop indexes that a newer declared index makes redundant"""
+    inspector = inspect(engine)
+    for table_name, index_names in REPLACED_INDEXES.items():
+        existing = {index["name"] for index in inspector.get_indexes(table_name)}
+        for name in index_names:
+            if name in existing:
+                with engine.begin() as conn:
+                    conn.execute(text(f"DROP INDEX {name}"))
+                logger.info(f"Dropped replaced index {name}")
+
+
+def _add_missing_columns():
+    """Add nullable columns declared since a table was created (create_all never alters tables)"""
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                raise RuntimeError(f"Cannot add non-nullable column {table.name}.{column.name} automatically")
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            logger.info(f"Added column {table.name}.{column.name}")
+
+
+def _dedupe_game_progress():
+    """Keep only the latest progress row per user so the unique user_id index can be created"""
+    indexes = {index["name"] for index in inspect(engine).get_indexes("game_progress")}
+    if "ux_game_progress_user_id" in indexes:
+        return
+    with engine.begin() as conn:
+        removed = conn.execute(text(
+            "DELETE FROM game_progress WHERE id IN ("
+            " SELECT id FROM ("
+            "  SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY updated_at DESC, id DESC) AS position"
+            "  FROM game_progress"
+            " ) ranked WHERE position > 1"
+            ")"
+        )).rowcount
+    if removed:
+        logger.info(f"Removed {removed} duplicate game progress rows")
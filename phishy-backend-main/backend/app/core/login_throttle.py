@@ -0,0 +1,250 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from app.utils.cache import TTLCache
+from app.utils.logger import get_logger
+from app.utils.metrics import register_metrics
+import os
+
+logger = get_logger("login_throttle.py")
+
+# Configuration
+LOGIN_THROTTLE_ENABLED = os.getenv("LOGIN_THROTTLE_ENABLED", "true").lower() == "true"
+LOGIN_USER_RATE_PER_MINUTE = float(os.getenv("LOGIN_USER_RATE_PER_MINUTE", "10"))
+LOGIN_USER_BURST = int(os.getenv("LOGIN_USER_BURST", "5"))
+LOGIN_IP_RATE_PER_MINUTE = float(os.getenv("LOGIN_IP_RATE_PER_MINUTE", "60"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "30"))
+LOGIN_MAX_FAILURES = int(os.getenv("LOGIN_MAX_FAILURES", "5"))
+LOGIN_FAILURE_WINDOW_SECONDS = int(os.getenv("LOGIN_FAILURE_WINDOW_SECONDS", "900"))
+LOGIN_LOCKOUT_SECONDS = int(os.getenv("LOGIN_LOCKOUT_SECONDS", "300"))
+LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))
+LOGIN_THROTTLE_REDIS_URL = os.getenv("LOGIN_THROTTLE_REDIS_URL")
+
+
+class _ExpiringMap:
+    """Entries dropped only once they expire, never evicted to make room.
+
+    Callers give every entry of a map the same lifetime, so insertion order is expiry order
+    and pruning only has to look at the oldest entries. Call with the store's lock held.
+    """
+
+    def __init__(self):
+        self._data = OrderedDict()
+
+    def _prune(self, now: float) -> None:
+        while self._data:
+            key, (_, expires_at) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[key]
+
+    def get(self, key: str, now: float):
+        self._prune(now)
+        entry = self._data.get(key)
+        return entry[0] if entry and entry[1] > now else None
+
+    def expires_at(self, key: str) -> Optional[float]:
+        entry = self._data.get(key)
+        return entry[1] if entry else None
+
+    def set(self, key: str, value, expires_at: float) -> None:
+        entry = self._data.get(key)
+        if entry is not None and entry[1] != expires_at:
+            # A new lifetime moves the key to the end, keeping the map in expiry order
+            del self._data[key]
+        self._data[key] = (value, expires_at)
+
+    def pop(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryThrottleStore:
+    """Per-process token buckets, failure counters and lockouts"""
+
+    blocking = False
+
+    def __init__(self, max_keys: int):
+        # Idle buckets expire once they would have refilled, so they can be evicted under pressure
+        self._buckets = TTLCache(maxsize=max_keys, ttl=3600)
+        # Failure counts and lockouts must survive a flood of other keys, so they only expire
+        self._failures = _ExpiringMap()
+        self._locks = _ExpiringMap()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; return 0 if allowed, else seconds until a token is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - updated) * rate)
+            retry_after = 0.0
+            if tokens < 1:
+                retry_after = (1 - tokens) / rate
+            else:
+                tokens -= 1
+            self._buckets.set(key, (tokens, now), ttl=burst / rate)
+        return retry_after
+
+    def add_failure(self, key: str) -> int:
+        """Count a failure; the window starts at the first failure, as with the Redis store"""
+        now = time.monotonic()
+        with self._lock:
+            count = self._failures.get(key, now)
+            if count is None:
+                count, expires_at = 1, now + LOGIN_FAILURE_WINDOW_SECONDS
+            else:
+                count, expires_at = count + 1, self._failures.expires_at(key)
+            self._failures.set(key, count, expires_at)
+        return count
+
+    def reset_failures(self, key: str) -> None:
+        with self._lock:
+            self._failures.pop(key)
+
+    def lock(self, key: str, seconds: int) -> None:
+        with self._lock:
+            self._locks.set(key, True, time.monotonic() + seconds)
+
+    def locked_for(self, key: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            if self._locks.get(key, now) is None:
+                return 0.0
+            return self._locks.expires_at(key) - now
+
+
+class RedisThrottleStore:
+    """Token buckets and lockouts shared by every worker through Redis"""
+
+    # Every call is a network round-trip, so async callers run it in the threadpool
+    blocking = True
+
+    _TAKE_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 't'))
+local updated = tonumber(redis.call('HGET', KEYS[1], 'ts'))
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+if tokens == nil then tokens = burst; updated = now end
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local retry = 0
+if tokens < 1 then retry = (1 - tokens) / rate else tokens = tokens - 1 end
+redis.call('HSET', KEYS[1], 't', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(retry)
+"""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("LOGIN_THROTTLE_REDIS_URL is set but the redis package is not installed")
+        self._redis = redis.Redis.from_url(url)
+        self._take = self._redis.register_script(self._TAKE_SCRIPT)
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        return float(self._take(keys=[f"throttle:{key}"], args=[rate, burst, time.time()]))
+
+    def add_failure(self, key: str) -> int:
+        pipe = self._redis.pipeline()
+        pipe.incr(f"throttle:fail:{key}")
+        pipe.expire(f"throttle:fail:{key}", LOGIN_FAILURE_WINDOW_SECONDS, nx=True)
+        return int(pipe.execute()[0])
+
+    def reset_failures(self, key: str) -> None:
+        self._redis.delete(f"throttle:fail:{key}")
+
+    def lock(self, key: str, seconds: int) -> None:
+        self._redis.set(f"throttle:lock:{key}", 1, ex=seconds)
+
+    def locked_for(self, key: str) -> float:
+        return float(max(0, self._redis.ttl(f"throttle:lock:{key}")))
+
+
+class LoginThrottle:
+    """Rejects abusive login attempts before any user lookup or bcrypt work"""
+
+    def __init__(self, store):
+        self.store = store
+        self.allowed = 0
+        self.rejected_user = 0
+        self.rejected_ip = 0
+        self.rejected_locked = 0
+        self.lockouts = 0
+
+    def check(self, username: str, client_ip: Optional[str]) -> int:
+        """Return 0 if the attempt may proceed, else the Retry-After in seconds"""
+        if not LOGIN_THROTTLE_ENABLED:
+            return 0
+        user_key = f"user:{username.lower()}"
+        locked_for = self.store.locked_for(user_key)
+        if locked_for:
+            self.rejected_locked += 1
+            return math.ceil(locked_for)
+        if client_ip:
+            retry_after = self.store.take(f"ip:{client_ip}", LOGIN_IP_RATE_PER_MINUTE / 60, LOGIN_IP_BURST)
+            if retry_after:
+                self.rejected_ip += 1
+                return math.ceil(retry_after)
+        retry_after = self.store.take(user_key, LOGIN_USER_RATE_PER_MINUTE / 60, LOGIN_USER_BURST)
+        if retry_after:
+            self.rejected_user += 1
+            return math.ceil(retry_after)
+        self.allowed += 1
+        return 0
+
+    def record_failure(self, username: str) -> None:
+        """Count a failed attempt and lock the username out after too many"""
+        if not LOGIN_THROTTLE_ENABLED:
+            return
+        user_key = f"user:{username.lower()}"
+        if self.store.add_failure(user_key) >= LOGIN_MAX_FAILURES:
+            self.store.lock(user_key, LOGIN_LOCKOUT_SECONDS)
+            self.store.reset_failures(user_key)
+            self.lockouts += 1
+            logger.warning(f"Locking out logins for {username} for {LOGIN_LOCKOUT_SECONDS}s")
+
+    def record_success(self, username: str) -> None:
+        if LOGIN_THROTTLE_ENABLED:
+            self.store.reset_failures(f"user:{username.lower()}")
+
+    async def _run(self, fn, *args):
+        if self.store.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def check_async(self, username: str, client_ip: Optional[str]) -> int:
+        """check() without blocking the event loop on the store"""
+        return await self._run(self.check, username, client_ip)
+
+    async def record_failure_async(self, username: str) -> None:
+        await self._run(self.record_failure, username)
+
+    async def record_success_async(self, username: str) -> None:
+        await self._run(self.record_success, username)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": LOGIN_THROTTLE_ENABLED,
+            "backend": type(self.store).__name__,
+            "allowed": self.allowed,
+            "rejected_user": self.rejected_user,
+            "rejected_ip": self.rejected_ip,
+            "rejected_locked": self.rejected_locked,
+            "lockouts": self.lockouts,
+        }
+
+
+def _build_store():
+    if LOGIN_THROTTLE_REDIS_URL:
+        logger.info("Using Redis for login throttling")
+        return RedisThrottleStore(LOGIN_THROTTLE_REDIS_URL)
+    return MemoryThrottleStore(LOGIN_THROTTLE_MAX_KEYS)
+
+
+login_throttle = LoginThrottle(_build_store())
+register_metrics("login_throttle", login_throttle.stats)
@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.modules.user.models.token import RevokedToken
+from app.utils.bloom import BloomFilter
+from app.utils.logger import get_logger
+from app.utils.metrics import register_metrics
+import os
+
+logger = get_logger("revocation.py")
+
+# Configuration
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+# How often each worker reloads the filter to pick up revocations made by other workers
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "60"))
+
+
+def user_revocation_key(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+class RevocationList:
+    """Revoked tokens mirrored into a Bloom filter so the common case needs no query"""
+
+    def __init__(self):
+        self._filter = BloomFilter(REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE)
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.filter_positives = 0
+        self.confirmed = 0
+
+    def load(self, db: Session, prune: bool = False) -> None:
+        """Rebuild the filter from the unexpired rows of revoked_tokens"""
+        now = datetime.utcnow()
+        if prune:
+            db.query(RevokedToken).filter(RevokedToken.expires_at < now).delete()
+            db.commit()
+        keys = [key for (key,) in db.query(RevokedToken.key).filter(RevokedToken.expires_at >= now)]
+        bloom = BloomFilter(max(REVOCATION_BLOOM_CAPACITY, len(keys) * 2), REVOCATION_BLOOM_ERROR_RATE)
+        for key in keys:
+            bloom.add(key)
+        with self._lock:
+            self._filter = bloom
+            self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(keys)} revoked token entries")
+
+    def _ensure_fresh(self, db: Session) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > REVOCATION_REFRESH_SECONDS:
+            self.load(db)
+
+    def revoke(self, db: Session, key: str, user_id: Optional[str], expires_at: datetime) -> None:
+        """Persist a revocation and add it to this worker's filter"""
+        db.merge(RevokedToken(key=key, user_id=user_id, revoked_at=datetime.utcnow(), expires_at=expires_at))
+        db.commit()
+        with self._lock:
+            self._filter.add(key)
+
+    def is_revoked(self, db: Session, claims: dict) -> bool:
+        """Check a token's jti and its user's blanket revocation, querying only on a filter hit"""
+        self._ensure_fresh(db)
+        self.checks += 1
+        jti = claims.get("jti")
+        user_key = user_revocation_key(claims.get("sub", ""))
+        jti_hit = jti is not None and jti in self._filter
+        user_hit = user_key in self._filter
+        if not (jti_hit or user_hit):
+            return False
+
+        self.filter_positives += 1
+        keys = [key for key, hit in ((jti, jti_hit), (user_key, user_hit)) if hit]
+        for row in db.query(RevokedToken).filter(RevokedToken.key.in_(keys)):
+            # iat carries fractions of a second, so a token issued just after the revocation survives it;
+            # this is what lets a reactivated user log in again while older tokens stay revoked
+            if row.key == jti or claims.get("iat", 0) <= row.revoked_at.replace(tzinfo=timezone.utc).timestamp():
+                self.confirmed += 1
+                return True
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._filter),
+            "filter_bits": self._filter.size,
+            "checks": self.checks,
+            "filter_positives": self.filter_positives,
+            "confirmed_revoked": self.confirmed,
+        }
+
+
+revocation_list = RevocationList()
+register_metrics("token_revocation", revocation_list.stats)
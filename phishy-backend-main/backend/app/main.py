@@ -5,7 +5,18 @@ from app.modules.user.routes.admin_routes import router as admin_router
 from app.modules.learning_path.routes.routes import router as learning_path_router
 from app.modules.game.routes.routes import router as game_router
 from app.utils.logger import get_logger
-from app.core.database import init_db
+from app.core.database import init_db, SessionLocal
+from app.core.revocation import revocation_list
+from app.modules.user.services.user_stats import init_user_stats
+from app.modules.user.services.search_index import init_user_search, search_index
+from app.modules.game.services.leaderboard import leaderboard
+from app.modules.game.services.scores import init_best_scores, leaderboard_stream
+from app.modules.game.services.score_buckets import init_score_buckets
+from app.modules.game.services.progress_buffer import progress_buffer
+from app.modules.game.services.save_data import collect_save_blobs
+from app.modules.game.services.assessment_stats import init_assessment_stats
+from app.modules.game.services.question_bank import question_bank
+from app.utils.password import hash_pool
 
 logger = get_logger("main")
 app = FastAPI(title="Phishy Game Backend API", version="1.0.0")
@@ -34,6 +45,36 @@ def startup():
     logger.info("Starting up the application...")
     logger.info(f"CORS enabled for origins: {origins}")
     init_db()  # Ensure tables exist on startup
+    question_bank.load()
+    db = SessionLocal()
+    try:
+        revocation_list.load(db, prune=True)
+        init_user_stats(db)
+        init_user_search(db)
+        leaderboard.load(db)
+        init_best_scores(db)
+        init_score_buckets(db)
+        collect_save_blobs(db)
+        init_assessment_stats(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def start_background_tasks():
+    progress_buffer.start()
+    leaderboard_stream.start()
+    search_index.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await progress_buffer.stop()
+    await leaderboard_stream.stop()
+    await search_index.stop()
+
+@app.on_event("shutdown")
+def shutdown():
+    logger.info("Shutting down the application...")
+    hash_pool.shutdown()
 
 # Include routers
 app.include_router(user_router)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, Float, ForeignKey, Text, Boolean
+from sqlalchemy import Column, String, DateTime, Integer, Float, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -22,6 +22,14 @@ class AssessmentSession(Base):
     # Relationship to assessment results
     results = relationship("AssessmentResult", back_populates="session", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Holds every column of the ownership check (session_id -> user_id, completed), so PostgreSQL can
+        # answer it with an index-only scan; SQLite always probes the unique session_id index and reads the row
+        Index("ix_assessment_sessions_session_id_user_id_completed", "session_id", "user_id", "completed"),
+        # Keyset pages of a user's history, newest first
+        Index("ix_assessment_sessions_user_id_created_at", "user_id", created_at.desc(), id.desc()),
+    )
+
 class AssessmentResult(Base):
     __tablename__ = 'assessment_results'
 
@@ -38,3 +46,17 @@ class AssessmentResult(Base):
 
     # Relationship to assessment session
     session = relationship("AssessmentSession", back_populates="results")
+
+class UserAssessmentStats(Base):
+    """Incrementally maintained assessment totals per user, read by GET /game/assessment/stats"""
+    __tablename__ = 'user_assessment_stats'
+
+    user_id = Column(String, ForeignKey('users.userid'), primary_key=True)
+    # Totals over completed sessions
+    total_sessions = Column(Integer, nullable=False, default=0)
+    total_score = Column(Integer, nullable=False, default=0)
+    total_questions = Column(Integer, nullable=False, default=0)
+    # Correct answers in any of the user's sessions
+    correct_answers = Column(Integer, nullable=False, default=0)
+    topics_completed = Column(Text, nullable=False, default="[]")  # JSON list of topics
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
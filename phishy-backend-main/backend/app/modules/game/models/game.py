@@ -1,9 +1,12 @@
-from sqlalchemy import Column, String, DateTime, Integer, Float, ForeignKey, Text, Boolean
+from sqlalchemy import Column, String, DateTime, Integer, Float, ForeignKey, Text, Boolean, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 from app.core.database import Base
 
+# Level used by the best-score tables for a user's best across all levels
+ALL_LEVELS = 0
+
 class GameProgress(Base):
     __tablename__ = 'game_progress'
 
@@ -18,7 +21,15 @@ class GameProgress(Base):
     completed = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    save_data = Column(Text, nullable=True)  # JSON string for game state
+    save_data = Column(Text, nullable=True)  # JSON string for game state (rows saved before compression)
+    save_blob = Column(LargeBinary, nullable=True)  # format version byte + compressed game state JSON
+    save_ref = Column(String(64), nullable=True)  # SHA-256 of the same bytes kept in the save blob store instead
+    save_revision = Column(Integer, nullable=True)  # bumped on every save_data change; base for patches
+
+    __table_args__ = (
+        # One progress row per user; saves upsert on this
+        Index("ux_game_progress_user_id", "user_id", unique=True),
+    )
 
     # Relationship (will be added later)
     # user = relationship("User", back_populates="game_progress")
@@ -35,7 +46,54 @@ class GameScore(Base):
     time_taken = Column(Float, nullable=False)  # in seconds
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Leaderboard order: highest score first, earliest submission breaking ties
+        Index("ix_game_scores_score_created_at_id", score.desc(), "created_at", "id"),
+        Index("ix_game_scores_user_id_score", "user_id", "score"),
+        # Leaderboard refreshes rescan recent scores
+        Index("ix_game_scores_created_at", "created_at"),
+    )
+
     # Relationship (will be added later)
     # user = relationship("User", back_populates="game_scores")
 
+class UserBestScore(Base):
+    """Best score per user and level, kept up to date on every score insert.
+
+    Level 0 holds each user's best score across all levels.
+    """
+    __tablename__ = 'user_best_scores'
+
+    user_id = Column(String, ForeignKey('users.userid'), primary_key=True)
+    level = Column(Integer, primary_key=True)
+    best_score = Column(Integer, nullable=False)
+    score_id = Column(String, ForeignKey('game_scores.id'), nullable=False)
+    achieved_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_user_best_scores_level_best_score", "level", best_score.desc(), "achieved_at", "user_id"),
+    )
+
+class ScoreBucket(Base):
+    """Best score per user and level within one day or week, for windowed leaderboards.
+
+    Level 0 holds the best across all levels; expired buckets are deleted.
+    """
+    __tablename__ = 'score_buckets'
+
+    period = Column(String, primary_key=True)  # "day" or "week"
+    bucket_start = Column(DateTime, primary_key=True)
+    level = Column(Integer, primary_key=True)
+    user_id = Column(String, ForeignKey('users.userid'), primary_key=True)
+    best_score = Column(Integer, nullable=False)
+    score_id = Column(String, ForeignKey('game_scores.id'), nullable=False)
+    achieved_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_score_buckets_period_start_level_best_score",
+            "period", "bucket_start", "level", best_score.desc(), "achieved_at", "user_id",
+        ),
+    )
+
 # Relationships will be added later to avoid circular imports
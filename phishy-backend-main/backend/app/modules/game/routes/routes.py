@@ -1,12 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.auth import get_current_active_user
 from app.modules.user.models.user import User
-from app.modules.game.models.game import GameProgress, GameScore
-from app.modules.game.models.assessment import AssessmentSession, AssessmentResult
+from app.modules.learning_path.models.learn_path import Topics
+from app.modules.game.services.assessment_stats import get_assessment_stats as get_user_assessment_stats
+from app.modules.game.services.assessment import (
+    start_session, owns_session, get_owned_session, end_session, submit_results, session_to_dict,
+    list_session_history, ASSESSMENT_BATCH_MAX_SIZE
+)
+from app.modules.game.services.progress import (
+    get_progress, save_progress, update_progress, progress_to_dict, progress_etag, SaveConflict, PreconditionFailed
+)
+from app.modules.game.services.save_data import deflate_save, read_save
+from app.modules.game.services.scores import (
+    create_game_score as save_game_score, create_game_scores, get_user_scores, get_top_scores as get_leaderboard,
+    get_top_players, get_score_rank, get_user_rank, score_to_dict, user_scores_etag, LeaderboardWindow,
+    SCORE_BATCH_MAX_SIZE, leaderboard_stream
+)
+from app.modules.game.services.leaderboard_stream import StreamFull
+from app.modules.game.services.question_bank import question_bank
+from app.utils.content_encoding import accepts_encoding
+from app.utils.etag import ConditionalRequest
+from app.utils.pagination import set_page_headers
 from app.utils.logger import get_logger
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -32,10 +51,14 @@ class GameProgressUpdate(BaseModel):
     time_played: Optional[float] = None
     completed: Optional[bool] = None
     save_data: Optional[str] = None
+    # JSON Patch (RFC 6902) against the save data at base_revision, instead of a full save_data
+    save_patch: Optional[List[dict]] = None
+    base_revision: Optional[int] = None
 
 class GameScoreCreate(BaseModel):
     score: int
-    level: int
+    # Levels start at 1; level 0 is the leaderboards' all-levels row
+    level: int = Field(ge=1)
     enemies_defeated: int = 0
     chests_collected: int = 0
     time_taken: float
@@ -53,6 +76,7 @@ class GameProgressResponse(BaseModel):
     created_at: str
     updated_at: str
     save_data: Optional[str] = None
+    save_revision: int = 0
 
     class Config:
         from_attributes = True
@@ -70,6 +94,11 @@ class GameScoreResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ScoreRankResponse(BaseModel):
+    score: int
+    rank: int
+    total: int
+
 @router.post("/progress/", response_model=GameProgressResponse)
 def create_game_progress(
     progress: GameProgressCreate,
@@ -79,61 +108,82 @@ def create_game_progress(
     """Create or update game progress for the current user"""
     logger.info(f"Creating/updating game progress for user {current_user.userid}")
     
-    # Check if user already has progress
-    existing_progress = db.query(GameProgress).filter(GameProgress.user_id == current_user.userid).first()
-    
-    if existing_progress:
-        # Update existing progress
-        for field, value in progress.dict(exclude_unset=True).items():
-            setattr(existing_progress, field, value)
-        existing_progress.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(existing_progress)
-        return existing_progress
-    else:
-        # Create new progress
-        new_progress = GameProgress(
-            user_id=current_user.userid,
-            **progress.dict()
-        )
-        db.add(new_progress)
-        db.commit()
-        db.refresh(new_progress)
-        return new_progress
+    saved = save_progress(db, current_user.userid, progress.dict(), progress.dict(exclude_unset=True))
+    return progress_to_dict(saved)
 
 @router.get("/progress/", response_model=GameProgressResponse)
 def get_my_game_progress(
+    conditional: ConditionalRequest = Depends(),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get game progress for the current user"""
     logger.info(f"Getting game progress for user {current_user.userid}")
     
-    progress = db.query(GameProgress).filter(GameProgress.user_id == current_user.userid).first()
+    progress = get_progress(db, current_user.userid)
     if not progress:
         raise HTTPException(status_code=404, detail="No game progress found")
-    return progress
+    not_modified = conditional.not_modified(progress_etag(progress))
+    if not_modified:
+        return not_modified
+    return progress_to_dict(progress)
+
+@router.get("/progress/save")
+def get_my_save_data(
+    request: Request,
+    conditional: ConditionalRequest = Depends(),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get only the current user's save data, sent compressed when the client accepts deflate"""
+    logger.info(f"Getting save data for user {current_user.userid}")
+    
+    progress = get_progress(db, current_user.userid)
+    if not progress or (progress.save_blob is None and progress.save_data is None and progress.save_ref is None):
+        raise HTTPException(status_code=404, detail="No save data found")
+    etag = progress_etag(progress)
+    not_modified = conditional.not_modified(etag)
+    if not_modified:
+        return not_modified
+    headers = {"X-Save-Revision": str(progress.save_revision or 0), "Vary": "Accept-Encoding", "ETag": etag}
+    if accepts_encoding(request.headers.get("accept-encoding"), "deflate"):
+        headers["Content-Encoding"] = "deflate"
+        body = deflate_save(progress.save_blob, progress.save_data, progress.save_ref)
+    else:
+        body = read_save(progress.save_blob, progress.save_data, progress.save_ref)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.put("/progress/", response_model=GameProgressResponse)
 def update_game_progress(
     progress_update: GameProgressUpdate,
+    conditional: ConditionalRequest = Depends(),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update game progress for the current user"""
     logger.info(f"Updating game progress for user {current_user.userid}")
     
-    progress = db.query(GameProgress).filter(GameProgress.user_id == current_user.userid).first()
+    if progress_update.save_patch is not None:
+        if progress_update.save_data is not None:
+            raise HTTPException(status_code=400, detail="Send either save_data or save_patch, not both")
+        if progress_update.base_revision is None:
+            raise HTTPException(status_code=400, detail="save_patch requires base_revision")
+    elif progress_update.base_revision is not None:
+        raise HTTPException(status_code=400, detail="base_revision requires save_patch")
+    try:
+        progress = update_progress(
+            db, current_user.userid, progress_update.dict(exclude_unset=True), if_match=conditional.if_match
+        )
+    except SaveConflict as e:
+        raise HTTPException(status_code=409, detail=f"Save data has changed (current revision {e.revision})")
+    except PreconditionFailed:
+        raise HTTPException(status_code=412, detail="Game progress has changed since it was read")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid save patch: {e}")
     if not progress:
         raise HTTPException(status_code=404, detail="No game progress found")
-    
-    for field, value in progress_update.dict(exclude_unset=True).items():
-        setattr(progress, field, value)
-    
-    progress.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(progress)
-    return progress
+    conditional.set_etag(progress_etag(progress))
+    return progress_to_dict(progress)
 
 @router.post("/scores/", response_model=GameScoreResponse)
 def create_game_score(
@@ -144,36 +194,95 @@ def create_game_score(
     """Save a new game score"""
     logger.info(f"Saving game score for user {current_user.userid}")
     
-    new_score = GameScore(
-        user_id=current_user.userid,
-        **score.dict()
-    )
-    db.add(new_score)
-    db.commit()
-    db.refresh(new_score)
-    return new_score
+    new_score = save_game_score(db, current_user.userid, score.dict())
+    return score_to_dict(new_score)
+
+@router.post("/scores/batch", response_model=List[GameScoreResponse])
+def create_game_scores_batch(
+    scores: List[GameScoreCreate],
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Save several game scores at once (e.g. runs played offline)"""
+    logger.info(f"Saving {len(scores)} game scores for user {current_user.userid}")
+    
+    if len(scores) > SCORE_BATCH_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {SCORE_BATCH_MAX_SIZE} scores can be saved per batch")
+    new_scores = create_game_scores(db, current_user.userid, [score.dict() for score in scores])
+    return [score_to_dict(score) for score in new_scores]
 
 @router.get("/scores/", response_model=List[GameScoreResponse])
 def get_my_game_scores(
+    conditional: ConditionalRequest = Depends(),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get all game scores for the current user"""
     logger.info(f"Getting game scores for user {current_user.userid}")
     
-    scores = db.query(GameScore).filter(GameScore.user_id == current_user.userid).order_by(GameScore.score.desc()).all()
-    return scores
+    not_modified = conditional.not_modified(user_scores_etag(db, current_user.userid))
+    if not_modified:
+        return not_modified
+    return [score_to_dict(score) for score in get_user_scores(db, current_user.userid)]
 
 @router.get("/scores/top", response_model=List[GameScoreResponse])
 def get_top_scores(
     limit: int = 10,
+    window: Optional[LeaderboardWindow] = None,
+    level: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+):
+    """Get top game scores across all users, or each player's best in a day/week/all-time window"""
+    logger.info(f"Getting top {limit} game scores" + (f" for window {window.value}" if window else ""))
+    
+    return [score_to_dict(score) for score in get_leaderboard(db, limit, window, level)]
+
+@router.get("/scores/stream")
+async def stream_top_scores():
+    """Server-Sent Events: a snapshot of the top scores, then a diff each time they change"""
+    try:
+        events = await leaderboard_stream.subscribe()
+    except StreamFull:
+        raise HTTPException(status_code=503, detail="Too many leaderboard subscribers, poll /game/scores/top instead")
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/scores/top/players", response_model=List[GameScoreResponse])
+def get_top_players_scores(
+    level: Optional[int] = Query(None, ge=1),
+    limit: int = 10,
+    db: Session = Depends(get_db)
+):
+    """Get each player's best score, one entry per player, optionally for a single level"""
+    logger.info(f"Getting top {limit} players" + (f" for level {level}" if level is not None else ""))
+    
+    return [score_to_dict(score) for score in get_top_players(db, level, limit)]
+
+@router.get("/scores/rank/me", response_model=ScoreRankResponse)
+def get_my_score_rank(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the leaderboard rank of the current user's best score"""
+    logger.info(f"Getting score rank for user {current_user.userid}")
+    
+    rank = get_user_rank(db, current_user.userid)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="No game scores found")
+    return rank
+
+@router.get("/scores/rank/{score}", response_model=ScoreRankResponse)
+def get_rank_for_score(
+    score: int,
     db: Session = Depends(get_db)
 ):
-    """Get top game scores across all users"""
-    logger.info(f"Getting top {limit} game scores")
+    """Get the leaderboard rank a score would take"""
+    logger.info(f"Getting rank for score {score}")
     
-    scores = db.query(GameScore).order_by(GameScore.score.desc()).limit(limit).all()
-    return scores
+    return get_score_rank(db, score)
 
 # Assessment schemas
 class AssessmentSessionCreate(BaseModel):
@@ -183,8 +292,9 @@ class AssessmentSessionCreate(BaseModel):
 class AssessmentResultCreate(BaseModel):
     question_id: str
     user_answer: str
-    correct_answer: str
-    is_correct: bool
+    # Only read when no question bank is loaded; with one, answers are graded on the server
+    correct_answer: Optional[str] = None
+    is_correct: Optional[bool] = None
     topic: str
     subcategory: str
     timestamp: str
@@ -213,6 +323,15 @@ class AssessmentSessionResponse(BaseModel):
             datetime: lambda v: v.isoformat() if v else None
         }
 
+class AssessmentResultsBatch(BaseModel):
+    results: List[AssessmentResultCreate]
+    # Ends the session in the same transaction, as POST /assessment/end would
+    end: Optional[AssessmentSessionEnd] = None
+
+class AssessmentResultsBatchResponse(BaseModel):
+    submitted: int
+    session: Optional[AssessmentSessionResponse] = None
+
 class AssessmentResultResponse(BaseModel):
     id: str
     session_id: str
@@ -229,6 +348,31 @@ class AssessmentResultResponse(BaseModel):
         from_attributes = True
 
 # Assessment endpoints
+@router.get("/assessment/questions")
+def get_assessment_questions(
+    request: Request,
+    topic: Optional[Topics] = None,
+    subcategory: Optional[str] = None,
+    conditional: ConditionalRequest = Depends(),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the question bank's questions (without answers) for a topic, or all of them, sent gzipped when accepted"""
+    logger.info(f"Getting assessment questions for topic {topic.value if topic else 'all'}")
+    
+    if subcategory is not None and topic is None:
+        raise HTTPException(status_code=400, detail="subcategory requires topic")
+    questions = question_bank.body(topic, subcategory)
+    if questions is None:
+        raise HTTPException(status_code=404, detail="No questions found")
+    not_modified = conditional.not_modified(questions.etag)
+    if not_modified:
+        return not_modified
+    headers = {"ETag": questions.etag, "Vary": "Accept-Encoding", "X-Question-Bank-Version": str(question_bank.version)}
+    if accepts_encoding(request.headers.get("accept-encoding"), "gzip"):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=questions.gzipped, media_type="application/json", headers=headers)
+    return Response(content=questions.body, media_type="application/json", headers=headers)
+
 @router.post("/assessment/start", response_model=AssessmentSessionResponse)
 def start_assessment_session(
     session_data: AssessmentSessionCreate,
@@ -238,29 +382,8 @@ def start_assessment_session(
     """Start a new assessment session"""
     logger.info(f"Starting assessment session for user {current_user.userid}")
     
-    new_session = AssessmentSession(
-        user_id=current_user.userid,
-        topic=session_data.topic,
-        start_time=datetime.fromisoformat(session_data.start_time.replace('Z', '+00:00'))
-    )
-    db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
-    
-    # Convert datetime fields to strings for JSON serialization
-    return {
-        "id": new_session.id,
-        "session_id": new_session.session_id,
-        "user_id": new_session.user_id,
-        "topic": new_session.topic,
-        "start_time": new_session.start_time.isoformat() if new_session.start_time else None,
-        "end_time": new_session.end_time.isoformat() if new_session.end_time else None,
-        "total_score": new_session.total_score,
-        "total_questions": new_session.total_questions,
-        "completed": new_session.completed,
-        "created_at": new_session.created_at.isoformat() if new_session.created_at else None,
-        "updated_at": new_session.updated_at.isoformat() if new_session.updated_at else None,
-    }
+    new_session = start_session(db, current_user.userid, session_data.topic, session_data.start_time)
+    return session_to_dict(new_session)
 
 @router.post("/assessment/result")
 def submit_assessment_result(
@@ -273,28 +396,44 @@ def submit_assessment_result(
     logger.info(f"Submitting assessment result for user {current_user.userid}")
     
     # Verify session belongs to user
-    session = db.query(AssessmentSession).filter(
-        AssessmentSession.session_id == session_id,
-        AssessmentSession.user_id == current_user.userid
-    ).first()
-    
-    if not session:
+    if not owns_session(db, session_id, current_user.userid):
         raise HTTPException(status_code=404, detail="Assessment session not found")
     
-    new_result = AssessmentResult(
-        session_id=session_id,
-        question_id=result_data.question_id,
-        user_answer=result_data.user_answer,
-        correct_answer=result_data.correct_answer,
-        is_correct=result_data.is_correct,
-        topic=result_data.topic,
-        subcategory=result_data.subcategory,
-        timestamp=datetime.fromisoformat(result_data.timestamp.replace('Z', '+00:00'))
-    )
-    db.add(new_result)
-    db.commit()
+    try:
+        submit_results(db, session_id, current_user.userid, [result_data.dict()])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid result: {e}")
     return {"message": "Assessment result submitted successfully"}
 
+@router.post("/assessment/{session_id}/results", response_model=AssessmentResultsBatchResponse)
+def submit_assessment_results(
+    session_id: str,
+    batch: AssessmentResultsBatch,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Submit many assessment results in one transaction, optionally ending the session"""
+    logger.info(f"Submitting {len(batch.results)} assessment results for user {current_user.userid}")
+    
+    if len(batch.results) > ASSESSMENT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400, detail=f"At most {ASSESSMENT_BATCH_MAX_SIZE} results can be submitted per batch"
+        )
+    results = [result.dict() for result in batch.results]
+    try:
+        if batch.end:
+            # Ending needs the full session row; plain answers only need the owner
+            session = get_owned_session(db, session_id, current_user.userid)
+            if not session:
+                raise HTTPException(status_code=404, detail="Assessment session not found")
+            session = end_session(db, session, batch.end.dict(), results)
+            return {"submitted": len(results), "session": session_to_dict(session)}
+        if not owns_session(db, session_id, current_user.userid):
+            raise HTTPException(status_code=404, detail="Assessment session not found")
+        return {"submitted": submit_results(db, session_id, current_user.userid, results), "session": None}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid result: {e}")
+
 @router.post("/assessment/end", response_model=AssessmentSessionResponse)
 def end_assessment_session(
     session_id: str,
@@ -305,72 +444,39 @@ def end_assessment_session(
     """End an assessment session"""
     logger.info(f"Ending assessment session for user {current_user.userid}")
     
-    session = db.query(AssessmentSession).filter(
-        AssessmentSession.session_id == session_id,
-        AssessmentSession.user_id == current_user.userid
-    ).first()
-    
+    session = get_owned_session(db, session_id, current_user.userid)
     if not session:
         raise HTTPException(status_code=404, detail="Assessment session not found")
     
-    session.end_time = datetime.fromisoformat(end_data.end_time.replace('Z', '+00:00'))
-    session.total_score = end_data.total_score
-    session.total_questions = end_data.total_questions
-    session.completed = True
-    session.updated_at = datetime.utcnow()
-    
-    db.commit()
-    db.refresh(session)
-    
-    # Convert datetime fields to strings for JSON serialization
-    return {
-        "id": session.id,
-        "session_id": session.session_id,
-        "user_id": session.user_id,
-        "topic": session.topic,
-        "start_time": session.start_time.isoformat() if session.start_time else None,
-        "end_time": session.end_time.isoformat() if session.end_time else None,
-        "total_score": session.total_score,
-        "total_questions": session.total_questions,
-        "completed": session.completed,
-        "created_at": session.created_at.isoformat() if session.created_at else None,
-        "updated_at": session.updated_at.isoformat() if session.updated_at else None,
-    }
+    return session_to_dict(end_session(db, session, end_data.dict()))
 
 @router.get("/assessment/history/{user_id}", response_model=List[AssessmentSessionResponse])
 def get_user_assessment_history(
     user_id: str,
+    response: Response,
+    topic: Optional[str] = None,
+    completed: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get assessment history for a user"""
+    """Get a page of assessment history for a user, newest first.
+
+    The next page's cursor is returned in the X-Next-Cursor header.
+    """
     logger.info(f"Getting assessment history for user {user_id}")
     
     # Only allow users to see their own history or admins to see any history
-    if current_user.userid != user_id and current_user.role not in ['admin', 'super-admin']:
+    if current_user.userid != user_id and current_user.role.value not in ['admin', 'super-admin']:
         raise HTTPException(status_code=403, detail="Not authorized to view this user's history")
     
-    sessions = db.query(AssessmentSession).filter(
-        AssessmentSession.user_id == user_id
-    ).order_by(AssessmentSession.created_at.desc()).all()
-    
-    # Convert datetime fields to strings for JSON serialization
-    return [
-        {
-            "id": session.id,
-            "session_id": session.session_id,
-            "user_id": session.user_id,
-            "topic": session.topic,
-            "start_time": session.start_time.isoformat() if session.start_time else None,
-            "end_time": session.end_time.isoformat() if session.end_time else None,
-            "total_score": session.total_score,
-            "total_questions": session.total_questions,
-            "completed": session.completed,
-            "created_at": session.created_at.isoformat() if session.created_at else None,
-            "updated_at": session.updated_at.isoformat() if session.updated_at else None,
-        }
-        for session in sessions
-    ]
+    try:
+        sessions, next_cursor = list_session_history(db, user_id, topic, completed, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, next_cursor)
+    return sessions
 
 @router.get("/assessment/stats/{user_id}")
 def get_assessment_stats(
@@ -382,41 +488,7 @@ def get_assessment_stats(
     logger.info(f"Getting assessment stats for user {user_id}")
     
     # Only allow users to see their own stats or admins to see any stats
-    if current_user.userid != user_id and current_user.role not in ['admin', 'super-admin']:
+    if current_user.userid != user_id and current_user.role.value not in ['admin', 'super-admin']:
         raise HTTPException(status_code=403, detail="Not authorized to view this user's stats")
     
-    # Get completed sessions
-    completed_sessions = db.query(AssessmentSession).filter(
-        AssessmentSession.user_id == user_id,
-        AssessmentSession.completed == True
-    ).all()
-    
-    if not completed_sessions:
-        return {
-            "total_sessions": 0,
-            "average_score": 0,
-            "total_questions": 0,
-            "correct_answers": 0,
-            "topics_completed": []
-        }
-    
-    total_sessions = len(completed_sessions)
-    total_score = sum(session.total_score for session in completed_sessions)
-    total_questions = sum(session.total_questions for session in completed_sessions)
-    average_score = total_score / total_sessions if total_sessions > 0 else 0
-    
-    # Get all results for this user
-    all_results = db.query(AssessmentResult).join(AssessmentSession).filter(
-        AssessmentSession.user_id == user_id
-    ).all()
-    
-    correct_answers = sum(1 for result in all_results if result.is_correct)
-    topics_completed = list(set(session.topic for session in completed_sessions))
-    
-    return {
-        "total_sessions": total_sessions,
-        "average_score": round(average_score, 2),
-        "total_questions": total_questions,
-        "correct_answers": correct_answers,
-        "topics_completed": topics_completed
-    }
+    return get_user_assessment_stats(db, user_id)
@@ -0,0 +1,193 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import insert, tuple_
+from sqlalchemy.orm import Session
+from app.modules.game.models.assessment import AssessmentSession, AssessmentResult
+from app.modules.game.services.assessment_stats import record_answers, record_session_end
+from app.modules.game.services.question_bank import question_bank
+from app.utils.cache import TTLCache
+from app.utils.logger import get_logger
+from app.utils.metrics import register_metrics
+from app.utils.pagination import encode_cursor, decode_cursor
+import os
+
+logger = get_logger("assessment.py")
+
+# Largest accepted POST /game/assessment/{session_id}/results
+ASSESSMENT_BATCH_MAX_SIZE = int(os.getenv("ASSESSMENT_BATCH_MAX_SIZE", "200"))
+# Open sessions' owners, so answer submissions skip the ownership query; owners never change, so entries cannot go stale
+SESSION_OWNER_CACHE_SECONDS = float(os.getenv("SESSION_OWNER_CACHE_SECONDS", "3600"))
+SESSION_OWNER_CACHE_MAX_SIZE = int(os.getenv("SESSION_OWNER_CACHE_MAX_SIZE", "10000"))
+ASSESSMENT_HISTORY_PAGE_DEFAULT_SIZE = int(os.getenv("ASSESSMENT_HISTORY_PAGE_DEFAULT_SIZE", "50"))
+ASSESSMENT_HISTORY_PAGE_MAX_SIZE = int(os.getenv("ASSESSMENT_HISTORY_PAGE_MAX_SIZE", "200"))
+
+# Columns of AssessmentSessionResponse, so history pages skip building ORM objects
+HISTORY_COLUMNS = (
+    AssessmentSession.id, AssessmentSession.session_id, AssessmentSession.user_id, AssessmentSession.topic,
+    AssessmentSession.start_time, AssessmentSession.end_time, AssessmentSession.total_score,
+    AssessmentSession.total_questions, AssessmentSession.completed, AssessmentSession.created_at,
+    AssessmentSession.updated_at,
+)
+
+session_owners = TTLCache(maxsize=SESSION_OWNER_CACHE_MAX_SIZE, ttl=SESSION_OWNER_CACHE_SECONDS)
+register_metrics("assessment_session_owners", session_owners.stats)
+
+def parse_client_time(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp sent by the client, accepting a trailing Z"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def session_to_dict(session: AssessmentSession) -> dict:
+    """Serialize a session for AssessmentSessionResponse"""
+    return {
+        "id": session.id,
+        "session_id": session.session_id,
+        "user_id": session.user_id,
+        "topic": session.topic,
+        "start_time": session.start_time.isoformat() if session.start_time else None,
+        "end_time": session.end_time.isoformat() if session.end_time else None,
+        "total_score": session.total_score,
+        "total_questions": session.total_questions,
+        "completed": session.completed,
+        "created_at": session.created_at.isoformat() if session.created_at else None,
+        "updated_at": session.updated_at.isoformat() if session.updated_at else None,
+    }
+
+def start_session(db: Session, user_id: str, topic: str, start_time: str) -> AssessmentSession:
+    """Create a session and remember its owner for the answers that follow"""
+    new_session = AssessmentSession(user_id=user_id, topic=topic, start_time=parse_client_time(start_time))
+    db.add(new_session)
+    db.commit()
+    db.refresh(new_session)
+    session_owners.set(new_session.session_id, user_id)
+    return new_session
+
+def owns_session(db: Session, session_id: str, user_id: str) -> bool:
+    """Whether the session exists and belongs to the user, from the cache or one lookup by session_id"""
+    owner = session_owners.get(session_id)
+    if owner is None:
+        row = db.query(AssessmentSession.user_id, AssessmentSession.completed).filter(
+            AssessmentSession.session_id == session_id
+        ).first()
+        if row is None:
+            return False
+        owner, completed = row
+        if not completed:
+            session_owners.set(session_id, owner)
+    return owner == user_id
+
+def get_owned_session(db: Session, session_id: str, user_id: str) -> Optional[AssessmentSession]:
+    """A session if it exists and belongs to the user"""
+    return db.query(AssessmentSession).filter(
+        AssessmentSession.session_id == session_id,
+        AssessmentSession.user_id == user_id
+    ).first()
+
+def list_session_history(
+    db: Session,
+    user_id: str,
+    topic: Optional[str] = None,
+    completed: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Get one keyset page of a user's sessions, newest first, ordered by (created_at, id).
+
+    Returns (sessions, next_cursor). Raises ValueError for a malformed cursor.
+    """
+    limit = min(max(1, limit or ASSESSMENT_HISTORY_PAGE_DEFAULT_SIZE), ASSESSMENT_HISTORY_PAGE_MAX_SIZE)
+
+    query = db.query(*HISTORY_COLUMNS).filter(AssessmentSession.user_id == user_id)
+    if topic is not None:
+        query = query.filter(AssessmentSession.topic == topic)
+    if completed is not None:
+        query = query.filter(AssessmentSession.completed == completed)
+    if cursor:
+        created_at, session_pk = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(AssessmentSession.created_at, AssessmentSession.id) < tuple_(created_at, session_pk)
+        )
+    # Fetch one extra row to learn whether another page follows
+    rows = query.order_by(AssessmentSession.created_at.desc(), AssessmentSession.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return [session_to_dict(row) for row in rows], next_cursor
+
+def _close_session(db: Session, session: AssessmentSession, end_data: dict) -> None:
+    previous = (session.total_score or 0, session.total_questions or 0) if session.completed else None
+    session.end_time = parse_client_time(end_data["end_time"])
+    session.total_score = end_data["total_score"]
+    session.total_questions = end_data["total_questions"]
+    session.completed = True
+    session.updated_at = datetime.utcnow()
+    record_session_end(db, session, previous)
+
+def end_session(
+    db: Session, session: AssessmentSession, end_data: dict, results: Optional[List[dict]] = None
+) -> AssessmentSession:
+    """Record a session's end time and totals, inserting any final answers in the same transaction.
+
+    Raises ValueError for an unparseable timestamp or an answer that cannot be graded; nothing is written then.
+    """
+    try:
+        if results:
+            _add_results(db, session.session_id, session.user_id, results)
+        _close_session(db, session, end_data)
+    except Exception:
+        db.rollback()
+        raise
+    db.commit()
+    db.refresh(session)
+    session_owners.pop(session.session_id)
+    return session
+
+def submit_results(db: Session, session_id: str, user_id: str, results: List[dict]) -> int:
+    """Insert many answers with one bulk INSERT in one transaction.
+
+    The caller checks ownership first. Raises ValueError for an unparseable timestamp or an answer that
+    cannot be graded before anything is written.
+    """
+    submitted = _add_results(db, session_id, user_id, results)
+    db.commit()
+    logger.info(f"Saved {submitted} assessment results for session {session_id}")
+    return submitted
+
+def grade_result(result: dict) -> Tuple[str, bool]:
+    """(correct_answer, is_correct) for a submitted answer.
+
+    With a question bank loaded, answers are graded on the server and questions missing from the bank
+    raise ValueError; the client's correct_answer and is_correct are never read. Without one, the
+    client's grading is kept, and raises ValueError if it is missing.
+    """
+    if question_bank.loaded:
+        grade = question_bank.grade(result["question_id"], result["user_answer"])
+        if grade is None:
+            raise ValueError(f"Unknown question {result['question_id']!r}")
+        return grade.correct_answer, grade.is_correct
+    if result.get("correct_answer") is None or result.get("is_correct") is None:
+        raise ValueError("correct_answer and is_correct are required without a question bank")
+    return result["correct_answer"], result["is_correct"]
+
+def _add_results(db: Session, session_id: str, user_id: str, results: List[dict]) -> int:
+    now = datetime.utcnow()
+    rows = []
+    for result in results:
+        correct_answer, is_correct = grade_result(result)
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "session_id": session_id,
+            "question_id": result["question_id"],
+            "user_answer": result["user_answer"],
+            "correct_answer": correct_answer,
+            "is_correct": is_correct,
+            "topic": result["topic"],
+            "subcategory": result["subcategory"],
+            "timestamp": parse_client_time(result["timestamp"]),
+            "created_at": now,
+        })
+    if rows:
+        db.execute(insert(AssessmentResult), rows)
+        record_answers(db, user_id, sum(1 for row in rows if row["is_correct"]))
+    return len(rows)
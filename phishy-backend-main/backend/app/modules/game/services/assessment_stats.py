@@ -0,0 +1,179 @@
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.modules.game.models.assessment import AssessmentSession, AssessmentResult, UserAssessmentStats
+from app.utils.logger import get_logger
+import os
+
+logger = get_logger("assessment_stats.py")
+
+# "summary": read the user's row in user_assessment_stats, maintained as sessions end and answers arrive.
+# "query": aggregate assessment_sessions and assessment_results on every request.
+ASSESSMENT_STATS_MODE = os.getenv("ASSESSMENT_STATS_MODE", "summary")
+
+COUNTERS = ("total_sessions", "total_score", "total_questions", "correct_answers")
+
+def _to_response(totals: dict) -> dict:
+    """Stats response; users without a completed session get zeros, as before"""
+    if not totals["total_sessions"]:
+        return {
+            "total_sessions": 0,
+            "average_score": 0,
+            "total_questions": 0,
+            "correct_answers": 0,
+            "topics_completed": []
+        }
+    return {
+        "total_sessions": totals["total_sessions"],
+        "average_score": round(totals["total_score"] / totals["total_sessions"], 2),
+        "total_questions": totals["total_questions"],
+        "correct_answers": totals["correct_answers"],
+        "topics_completed": totals["topics_completed"],
+    }
+
+def _empty_totals() -> dict:
+    return {**{name: 0 for name in COUNTERS}, "topics_completed": []}
+
+def get_assessment_stats(db: Session, user_id: str) -> dict:
+    """A user's assessment stats: one primary-key read in summary mode, one aggregate query otherwise"""
+    if ASSESSMENT_STATS_MODE == "summary":
+        row = db.get(UserAssessmentStats, user_id)
+        return _to_response(_row_totals(row) if row is not None else _empty_totals())
+    return _to_response(compute_assessment_stats(db, user_id))
+
+def compute_assessment_stats(db: Session, user_id: str) -> dict:
+    """Totals for one user from the raw tables, in one statement grouped by topic"""
+    correct = (
+        select(func.count())
+        .select_from(AssessmentResult)
+        .join(AssessmentSession, AssessmentSession.session_id == AssessmentResult.session_id)
+        .where(AssessmentSession.user_id == user_id, AssessmentResult.is_correct == True)
+        .scalar_subquery()
+    )
+    rows = db.query(
+        AssessmentSession.topic,
+        func.count(),
+        func.coalesce(func.sum(AssessmentSession.total_score), 0),
+        func.coalesce(func.sum(AssessmentSession.total_questions), 0),
+        correct,
+    ).filter(
+        AssessmentSession.user_id == user_id,
+        AssessmentSession.completed == True
+    ).group_by(AssessmentSession.topic).all()
+
+    totals = _empty_totals()
+    for topic, sessions, score, questions, correct_answers in rows:
+        totals["total_sessions"] += sessions
+        totals["total_score"] += score
+        totals["total_questions"] += questions
+        totals["correct_answers"] = correct_answers
+        totals["topics_completed"].append(topic)
+    totals["topics_completed"].sort()
+    return totals
+
+def _row_totals(row: UserAssessmentStats) -> dict:
+    return {
+        **{name: getattr(row, name) or 0 for name in COUNTERS},
+        "topics_completed": json.loads(row.topics_completed or "[]"),
+    }
+
+def _add_to_summary(db: Session, user_id: str, **deltas) -> None:
+    """Add deltas to a user's counters, creating the row on first use"""
+    now = datetime.utcnow()
+    stmt = dialect_insert(db, UserAssessmentStats).values(user_id=user_id, updated_at=now, **deltas)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserAssessmentStats.user_id],
+        set_={
+            **{name: getattr(UserAssessmentStats, name) + getattr(stmt.excluded, name) for name in deltas},
+            "updated_at": now,
+        },
+    ))
+
+def record_answers(db: Session, user_id: str, correct_answers: int) -> None:
+    """Count correct answers as they are submitted; runs in the caller's transaction"""
+    if correct_answers:
+        _add_to_summary(db, user_id, correct_answers=correct_answers)
+
+def record_session_end(db: Session, session: AssessmentSession, previous: Optional[Tuple[int, int]]) -> None:
+    """Add an ended session to its user's totals; runs in the caller's transaction.
+
+    previous is (total_score, total_questions) if the session had already been ended, so only the change is added.
+    """
+    prior_score, prior_questions = previous if previous is not None else (0, 0)
+    _add_to_summary(
+        db,
+        session.user_id,
+        total_sessions=0 if previous is not None else 1,
+        total_score=(session.total_score or 0) - prior_score,
+        total_questions=(session.total_questions or 0) - prior_questions,
+    )
+    # The upsert holds the row lock until commit, so this read-modify-write cannot race
+    topics = json.loads(db.execute(
+        select(UserAssessmentStats.topics_completed).where(UserAssessmentStats.user_id == session.user_id)
+    ).scalar() or "[]")
+    if session.topic not in topics:
+        db.execute(
+            update(UserAssessmentStats)
+            .where(UserAssessmentStats.user_id == session.user_id)
+            .values(topics_completed=json.dumps(sorted(topics + [session.topic])))
+        )
+
+def _compute_all(db: Session) -> Dict[str, dict]:
+    """Totals for every user from the raw tables"""
+    totals: Dict[str, dict] = {}
+    for user_id, topic, sessions, score, questions in db.query(
+        AssessmentSession.user_id,
+        AssessmentSession.topic,
+        func.count(),
+        func.coalesce(func.sum(AssessmentSession.total_score), 0),
+        func.coalesce(func.sum(AssessmentSession.total_questions), 0),
+    ).filter(AssessmentSession.completed == True).group_by(AssessmentSession.user_id, AssessmentSession.topic):
+        user = totals.setdefault(user_id, _empty_totals())
+        user["total_sessions"] += sessions
+        user["total_score"] += score
+        user["total_questions"] += questions
+        user["topics_completed"].append(topic)
+    for user_id, correct_answers in db.query(AssessmentSession.user_id, func.count()).join(
+        AssessmentResult, AssessmentResult.session_id == AssessmentSession.session_id
+    ).filter(AssessmentResult.is_correct == True).group_by(AssessmentSession.user_id):
+        totals.setdefault(user_id, _empty_totals())["correct_answers"] = correct_answers
+    for user in totals.values():
+        user["topics_completed"].sort()
+    return totals
+
+def check_user_assessment_stats(db: Session) -> List[str]:
+    """User ids whose user_assessment_stats row disagrees with the raw tables"""
+    expected = _compute_all(db)
+    stored = {row.user_id: _row_totals(row) for row in db.query(UserAssessmentStats)}
+    return sorted(
+        user_id for user_id in expected.keys() | stored.keys()
+        if expected.get(user_id, _empty_totals()) != stored.get(user_id, _empty_totals())
+    )
+
+def rebuild_user_assessment_stats(db: Session) -> int:
+    """Recompute user_assessment_stats from the raw tables; returns the number of rows written"""
+    totals = _compute_all(db)
+    now = datetime.utcnow()
+    db.execute(delete(UserAssessmentStats))
+    rows = [
+        {
+            "user_id": user_id,
+            **{name: user[name] for name in COUNTERS},
+            "topics_completed": json.dumps(user["topics_completed"]),
+            "updated_at": now,
+        }
+        for user_id, user in totals.items()
+    ]
+    if rows:
+        db.execute(insert(UserAssessmentStats), rows)
+    db.commit()
+    logger.info(f"Rebuilt assessment stats for {len(rows)} users")
+    return len(rows)
+
+def init_assessment_stats(db: Session) -> None:
+    """Backfill user_assessment_stats when sessions predate the table"""
+    if db.query(UserAssessmentStats.user_id).first() is None and db.query(AssessmentSession.id).first() is not None:
+        rebuild_user_assessment_stats(db)
@@ -0,0 +1,118 @@
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.modules.game.models.game import GameScore
+from app.utils.logger import get_logger
+from app.utils.metrics import register_metrics
+import os
+
+logger = get_logger("leaderboard.py")
+
+# How often each worker pulls in scores saved by other workers
+LEADERBOARD_REFRESH_SECONDS = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "30"))
+# How far before the newest known score each refresh looks again: created_at is set before commit,
+# so another worker's score can land with an earlier created_at than one already seen
+LEADERBOARD_REFRESH_LOOKBACK_SECONDS = float(os.getenv("LEADERBOARD_REFRESH_LOOKBACK_SECONDS", "300"))
+
+# Sort key matching ORDER BY score DESC, created_at, id
+ScoreKey = Tuple[int, datetime, str]
+
+def score_key(score: int, created_at: datetime, score_id: str) -> ScoreKey:
+    return (-score, created_at, score_id)
+
+
+class Leaderboard:
+    """Order-statistic view of game_scores: a sorted array of score keys searched with bisect"""
+
+    def __init__(self):
+        self._keys: List[ScoreKey] = []
+        self._best = {}  # user_id -> best ScoreKey
+        self._ids = set()
+        self._watermark: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> None:
+        """Rebuild the leaderboard from game_scores"""
+        keys, best, ids = [], {}, set()
+        watermark = None
+        for score_id, user_id, score, created_at in db.query(
+            GameScore.id, GameScore.user_id, GameScore.score, GameScore.created_at
+        ):
+            key = score_key(score, created_at, score_id)
+            keys.append(key)
+            ids.add(score_id)
+            if user_id not in best or key < best[user_id]:
+                best[user_id] = key
+            if watermark is None or created_at > watermark:
+                watermark = created_at
+        keys.sort()
+        with self._lock:
+            self._keys, self._best, self._ids = keys, best, ids
+            self._watermark = watermark
+            self._refreshed_at = time.monotonic()
+        logger.info(f"Loaded {len(keys)} scores into the leaderboard")
+
+    def add(self, score_id: str, user_id: str, score: int, created_at: datetime) -> bool:
+        """Insert a committed score, ignoring ones already present; True if it was new"""
+        if self._refreshed_at is None:
+            return False
+        key = score_key(score, created_at, score_id)
+        with self._lock:
+            if score_id in self._ids:
+                return False
+            bisect.insort(self._keys, key)
+            self._ids.add(score_id)
+            if user_id not in self._best or key < self._best[user_id]:
+                self._best[user_id] = key
+            if self._watermark is None or created_at > self._watermark:
+                self._watermark = created_at
+        return True
+
+    def ensure_fresh(self, db: Session, max_age: float = LEADERBOARD_REFRESH_SECONDS) -> None:
+        """Load on first use, then pick up scores committed elsewhere once the last refresh is max_age old"""
+        if self._refreshed_at is None:
+            self.load(db)
+            return
+        if time.monotonic() - self._refreshed_at <= max_age:
+            return
+        query = db.query(GameScore.id, GameScore.user_id, GameScore.score, GameScore.created_at)
+        if self._watermark is not None:
+            # Scores already present are skipped by id
+            query = query.filter(
+                GameScore.created_at >= self._watermark - timedelta(seconds=LEADERBOARD_REFRESH_LOOKBACK_SECONDS)
+            )
+        for row in query:
+            self.add(*row)
+        self._refreshed_at = time.monotonic()
+
+    def top_ids(self, limit: int) -> List[str]:
+        """IDs of the best limit scores, best first"""
+        with self._lock:
+            return [key[2] for key in self._keys[:limit]]
+
+    def rank_of_score(self, score: int) -> int:
+        """Rank a score would take: one more than the number of strictly higher scores"""
+        with self._lock:
+            return bisect.bisect_left(self._keys, (-score,)) + 1
+
+    def rank_of_user(self, user_id: str) -> Optional[Tuple[int, int]]:
+        """(best score, rank of that score) for a user, or None without scores"""
+        with self._lock:
+            key = self._best.get(user_id)
+            if key is None:
+                return None
+            return -key[0], bisect.bisect_left(self._keys, key) + 1
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def stats(self) -> dict:
+        return {"scores": len(self._keys), "players": len(self._best)}
+
+
+leaderboard = Leaderboard()
+register_metrics("leaderboard", leaderboard.stats)
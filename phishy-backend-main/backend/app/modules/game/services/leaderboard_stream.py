@@ -0,0 +1,197 @@
+import asyncio
+import json
+import threading
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.modules.game.models.game import GameScore
+from app.modules.game.services.leaderboard import Leaderboard
+from app.utils.logger import get_logger
+import os
+
+logger = get_logger("leaderboard_stream.py")
+
+# Number of top scores pushed to /game/scores/stream subscribers
+LEADERBOARD_STREAM_SIZE = int(os.getenv("LEADERBOARD_STREAM_SIZE", "10"))
+# Events a subscriber may fall behind by before it is disconnected
+LEADERBOARD_STREAM_QUEUE_SIZE = int(os.getenv("LEADERBOARD_STREAM_QUEUE_SIZE", "32"))
+LEADERBOARD_STREAM_MAX_SUBSCRIBERS = int(os.getenv("LEADERBOARD_STREAM_MAX_SUBSCRIBERS", "10000"))
+# Comment lines keep idle connections open through proxies
+LEADERBOARD_STREAM_KEEPALIVE_SECONDS = float(os.getenv("LEADERBOARD_STREAM_KEEPALIVE_SECONDS", "15"))
+# While anyone is subscribed, how often the leaderboard is refreshed to pick up other workers' scores
+LEADERBOARD_STREAM_REFRESH_SECONDS = float(os.getenv("LEADERBOARD_STREAM_REFRESH_SECONDS", "5"))
+
+Event = Tuple[int, str]
+
+
+class StreamFull(Exception):
+    """Raised when a process already has LEADERBOARD_STREAM_MAX_SUBSCRIBERS subscribers"""
+
+
+def format_event(event: str, data: dict) -> str:
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class LeaderboardStream:
+    """Pushes top-N leaderboard changes to subscribers through one shared broadcaster per process.
+
+    Score writes (on threadpool threads) compare the in-memory top-N with the last one sent and, if it
+    changed, queue a diff to every subscriber on the event loop. While anyone is subscribed, a periodic
+    refresh does the same for scores saved by other workers. Each subscriber has a bounded queue;
+    one that falls behind is dropped instead of buffered.
+    """
+
+    def __init__(self, board: Leaderboard, serialize: Callable[[GameScore], dict], size: int):
+        self.board = board
+        self.serialize = serialize
+        self.size = size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._version = 0
+        # Last sent top-N, or None while nobody is subscribed
+        self._top: Optional[List[dict]] = None
+        self.diffs_sent = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        """Bind to the running event loop and start the refresh task; call from a startup handler"""
+        self._loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(LEADERBOARD_STREAM_REFRESH_SECONDS)
+            if self._subscribers:
+                await run_in_threadpool(self._refresh)
+
+    def _refresh(self) -> None:
+        """Pull in scores committed by other workers and push a diff if they changed the top-N"""
+        db = SessionLocal()
+        try:
+            self.board.ensure_fresh(db, max_age=0)
+            self.scores_added(db, [])
+        except Exception as e:
+            logger.error(f"Failed to refresh the leaderboard stream: {e}")
+        finally:
+            db.close()
+
+    def scores_added(self, db: Session, scores: List[GameScore]) -> None:
+        """Push a diff if committed scores (those given, or any already in the leaderboard) changed the top-N"""
+        if self._loop is None:
+            return
+        with self._lock:
+            if not self._subscribers:
+                self._top = None
+                return
+            previous = self._top
+            if previous is None:
+                return
+            if [entry["id"] for entry in previous] == self.board.top_ids(self.size):
+                return
+            top = self._build_top(db, {score.id: score for score in scores})
+            diff = self._diff(previous, top)
+            self._version += 1
+            self._top = top
+            event = (self._version, format_event("diff", diff))
+            self._loop.call_soon_threadsafe(self._fanout, event)
+
+    def _build_top(self, db: Session, new_scores: Dict[str, GameScore]) -> List[dict]:
+        """Current top-N entries, reusing the last ones sent and reading only unknown scores"""
+        ids = self.board.top_ids(self.size)
+        known = {entry["id"]: entry for entry in (self._top or [])}
+        for score_id, score in new_scores.items():
+            known[score_id] = self.serialize(score)
+        missing = [score_id for score_id in ids if score_id not in known]
+        if missing:
+            for score in db.query(GameScore).filter(GameScore.id.in_(missing)):
+                known[score.id] = self.serialize(score)
+        return [{**known[score_id], "rank": rank} for rank, score_id in enumerate(ids, 1) if score_id in known]
+
+    @staticmethod
+    def _diff(previous: List[dict], top: List[dict]) -> dict:
+        """Entries that are new or moved, and ids that left the top-N"""
+        before = {entry["id"]: entry["rank"] for entry in previous}
+        current = {entry["id"] for entry in top}
+        return {
+            "entries": [entry for entry in top if before.get(entry["id"]) != entry["rank"]],
+            "removed": [entry["id"] for entry in previous if entry["id"] not in current],
+        }
+
+    def _fanout(self, event: Event) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(queue)
+        self.diffs_sent += 1
+
+    def _drop(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        # None tells the subscriber's generator to close the stream
+        queue.put_nowait(None)
+        self.dropped += 1
+
+    def _snapshot(self) -> Event:
+        with self._lock:
+            if self._top is None:
+                db = SessionLocal()
+                try:
+                    self._top = self._build_top(db, {})
+                finally:
+                    db.close()
+            return self._version, format_event("snapshot", {"entries": self._top})
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Register a subscriber and return its SSE message stream, starting with a snapshot"""
+        if len(self._subscribers) >= LEADERBOARD_STREAM_MAX_SUBSCRIBERS:
+            raise StreamFull()
+        queue = asyncio.Queue(maxsize=LEADERBOARD_STREAM_QUEUE_SIZE)
+        # Register before the snapshot is taken so no diff after it can be missed
+        self._subscribers.add(queue)
+        try:
+            version, snapshot = await run_in_threadpool(self._snapshot)
+        except Exception:
+            self._subscribers.discard(queue)
+            raise
+        return self._stream(queue, version, snapshot)
+
+    async def _stream(self, queue: asyncio.Queue, version: int, snapshot: str) -> AsyncIterator[str]:
+        try:
+            yield snapshot
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), LEADERBOARD_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    return
+                event_version, message = event
+                # Diffs already included in the snapshot are skipped
+                if event_version > version:
+                    yield message
+        finally:
+            self._subscribers.discard(queue)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "diffs_sent": self.diffs_sent,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,184 @@
+import json
+import uuid
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.modules.game.models.game import GameProgress
+from app.modules.game.services.progress_buffer import progress_buffer, COLUMNS, FLUSHED_COLUMNS
+from app.modules.game.services.save_data import read_save, save_columns
+from app.utils.etag import PreconditionFailed, etag_matches, weak_etag
+from app.utils.json_patch import apply_patch
+from app.utils.logger import get_logger
+
+logger = get_logger("progress.py")
+
+
+class SaveConflict(Exception):
+    """Raised when a save patch is based on a revision other than the stored one"""
+
+    def __init__(self, revision: int):
+        super().__init__(f"Save data is at revision {revision}")
+        self.revision = revision
+
+
+def progress_to_dict(progress: GameProgress) -> dict:
+    """Serialize progress for GameProgressResponse"""
+    return {
+        "id": progress.id,
+        "user_id": progress.user_id,
+        "level": progress.level,
+        "current_score": progress.current_score,
+        "highest_score": progress.highest_score,
+        "enemies_defeated": progress.enemies_defeated,
+        "chests_collected": progress.chests_collected,
+        "time_played": progress.time_played,
+        "completed": progress.completed,
+        "created_at": progress.created_at.isoformat() if progress.created_at else None,
+        "updated_at": progress.updated_at.isoformat() if progress.updated_at else None,
+        "save_data": read_save(progress.save_blob, progress.save_data, progress.save_ref),
+        "save_revision": progress.save_revision or 0,
+    }
+
+def progress_etag(progress: GameProgress) -> str:
+    """Weak ETag of a progress row, from its metadata only"""
+    return weak_etag(progress.id, progress.updated_at, progress.save_revision or 0)
+
+def _check_if_match(progress: GameProgress, if_match: Optional[str]) -> None:
+    if if_match is not None and not etag_matches(if_match, progress_etag(progress)):
+        raise PreconditionFailed()
+
+def apply_progress_changes(state: dict, changed: dict) -> None:
+    """Apply changed fields to a progress row's column values.
+
+    save_data is stored compressed and bumps save_revision; save_patch is a JSON Patch
+    applied to the current save data, and must name the current revision as base_revision.
+    """
+    changed = dict(changed)
+    patch = changed.pop("save_patch", None)
+    base_revision = changed.pop("base_revision", None)
+    revision = state.get("save_revision") or 0
+    if patch is not None:
+        if base_revision != revision:
+            raise SaveConflict(revision)
+        current = read_save(state.get("save_blob"), state.get("save_data"), state.get("save_ref"))
+        document = apply_patch(json.loads(current) if current is not None else None, patch, in_place=True)
+        changed["save_data"] = json.dumps(document, separators=(",", ":"))
+    if "save_data" in changed:
+        state.update(save_columns(changed.pop("save_data")))
+        state["save_revision"] = revision + 1
+    state.update(changed)
+    state["updated_at"] = datetime.utcnow()
+
+def _encode_save_columns(changed: dict, revision) -> dict:
+    """Replace a full save_data value with its stored columns and the next revision"""
+    if "save_data" not in changed:
+        return changed
+    changed = dict(changed)
+    changed.update(save_columns(changed.pop("save_data")))
+    changed["save_revision"] = revision
+    return changed
+
+def get_progress(db: Session, user_id: str) -> Optional[GameProgress]:
+    """A user's progress, including updates still held by the write-behind buffer"""
+    pending = progress_buffer.get(user_id)
+    if pending is not None:
+        return GameProgress(**pending)
+    return db.query(GameProgress).filter(GameProgress.user_id == user_id).first()
+
+def save_progress(db: Session, user_id: str, values: dict, changed: dict) -> GameProgress:
+    """Create or update a user's progress in one INSERT ... ON CONFLICT (user_id) DO UPDATE ... RETURNING.
+
+    values seed a new row; only changed is written over an existing one.
+    """
+    pending = progress_buffer.take(user_id)
+    if pending is not None:
+        # Write buffered updates along with this save so none are lost or reordered
+        apply_progress_changes(pending, changed)
+        changed = {name: pending[name] for name in FLUSHED_COLUMNS}
+    else:
+        changed = _encode_save_columns(changed, func.coalesce(GameProgress.save_revision, 0) + 1)
+    values = _encode_save_columns(values, 1 if values.get("save_data") is not None else 0)
+    now = datetime.utcnow()
+    stmt = dialect_insert(db, GameProgress).values(
+        id=str(uuid.uuid4()), user_id=user_id, created_at=now, updated_at=now, **values
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GameProgress.user_id],
+        set_={**changed, "updated_at": now},
+    ).returning(GameProgress)
+    progress = db.scalars(stmt, execution_options={"populate_existing": True}).one()
+    # Detach so the commit does not expire the returned values and cost another SELECT
+    db.expunge(progress)
+    db.commit()
+    return progress
+
+def update_progress(db: Session, user_id: str, changed: dict, if_match: Optional[str] = None) -> Optional[GameProgress]:
+    """Update an existing progress row in one UPDATE ... RETURNING, or return None if there is none.
+
+    With write-behind enabled the update is buffered and flushed later instead.
+    Raises SaveConflict for a save_patch against a stale base_revision, and PreconditionFailed
+    if if_match is given and does not match the row's ETag.
+    """
+    if progress_buffer.enabled:
+        def apply(state: dict) -> None:
+            _check_if_match(GameProgress(**state), if_match)
+            apply_progress_changes(state, changed)
+        state = progress_buffer.update(db, user_id, apply)
+        return GameProgress(**state) if state is not None else None
+    if changed.get("save_patch") is not None or if_match is not None:
+        return _update_locked(db, user_id, changed, if_match)
+    # Only save_patch needs base_revision; neither is a column
+    changed = {name: value for name, value in changed.items() if name not in ("save_patch", "base_revision")}
+    changed = _encode_save_columns(changed, func.coalesce(GameProgress.save_revision, 0) + 1)
+    stmt = (
+        update(GameProgress)
+        .where(GameProgress.user_id == user_id)
+        .values(**changed, updated_at=datetime.utcnow())
+        .returning(GameProgress)
+    )
+    progress = db.scalars(stmt, execution_options={"populate_existing": True}).one_or_none()
+    if progress is not None:
+        db.expunge(progress)
+    db.commit()
+    return progress
+
+def _update_locked(db: Session, user_id: str, changed: dict, if_match: Optional[str]) -> Optional[GameProgress]:
+    """Lock and read the row, check it against the patch revision and If-Match, and write it only if it is unchanged"""
+    progress = db.query(GameProgress).filter(GameProgress.user_id == user_id).with_for_update().first()
+    if progress is None:
+        db.rollback()
+        return None
+    state = {name: getattr(progress, name) for name in COLUMNS}
+    try:
+        _check_if_match(progress, if_match)
+        apply_progress_changes(state, changed)
+    except Exception:
+        db.rollback()
+        raise
+    # Guards against writers that got in between, where the database does not honour FOR UPDATE
+    conditions = [GameProgress.user_id == user_id]
+    patching = changed.get("save_patch") is not None
+    if patching:
+        conditions.append(func.coalesce(GameProgress.save_revision, 0) == changed["base_revision"])
+    if if_match is not None:
+        conditions.append(GameProgress.updated_at == progress.updated_at)
+    stmt = (
+        update(GameProgress)
+        .where(*conditions)
+        .values({name: state[name] for name in FLUSHED_COLUMNS})
+        .returning(GameProgress)
+    )
+    progress = db.scalars(stmt, execution_options={"populate_existing": True}).one_or_none()
+    if progress is None:
+        db.rollback()
+        current = get_progress(db, user_id)
+        if current is None:
+            return None
+        if patching and (current.save_revision or 0) != changed["base_revision"]:
+            raise SaveConflict(current.save_revision or 0)
+        raise PreconditionFailed()
+    db.expunge(progress)
+    db.commit()
+    return progress
@@ -0,0 +1,180 @@
+import asyncio
+import threading
+from typing import Callable, Dict, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.modules.game.models.game import GameProgress
+from app.utils.logger import get_logger
+from app.utils.metrics import register_metrics
+import os
+
+logger = get_logger("progress_buffer.py")
+
+# Write-behind for PUT /game/progress/: updates are held per user and flushed in batches.
+# Buffers are per worker, so run a single worker (or sticky sessions) when enabling it.
+PROGRESS_WRITE_BEHIND = os.getenv("PROGRESS_WRITE_BEHIND", "false").lower() == "true"
+# Durability bounds: the longest an update waits, and how many users may have unsaved updates
+PROGRESS_FLUSH_INTERVAL_SECONDS = float(os.getenv("PROGRESS_FLUSH_INTERVAL_SECONDS", "5"))
+PROGRESS_BUFFER_MAX_DIRTY = int(os.getenv("PROGRESS_BUFFER_MAX_DIRTY", "10000"))
+PROGRESS_FLUSH_BATCH_SIZE = 500
+
+COLUMNS = [column.name for column in GameProgress.__table__.columns]
+FLUSHED_COLUMNS = [name for name in COLUMNS if name not in ("id", "user_id", "created_at")]
+
+
+class ProgressBuffer:
+    """Latest unsaved progress per user; later updates replace earlier ones before they reach the database"""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._pending: Dict[str, dict] = {}
+        # Entries being written by the flush in progress; they stay visible until its commit lands
+        self._flushing: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.buffered = 0
+        self.coalesced = 0
+        self.rows_flushed = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def update(self, db: Session, user_id: str, apply: Callable[[dict], None]) -> Optional[dict]:
+        """Apply a change to the user's progress in memory; None if the user has no progress row.
+
+        apply mutates a copy of the row's column values outside the lock, since it may write save
+        blobs; if the entry changed meanwhile, apply runs again on the newer state. If it raises,
+        the buffer is left unchanged.
+        """
+        while True:
+            with self._lock:
+                base = self._current(user_id)
+            if base is None:
+                progress = db.query(GameProgress).filter(GameProgress.user_id == user_id).first()
+                if progress is None:
+                    return None
+                state = {name: getattr(progress, name) for name in COLUMNS}
+            else:
+                state = dict(base)
+            apply(state)
+
+            with self._lock:
+                if self._current(user_id) is not base:
+                    # Updated or flushed since we read it; apply the change to the newer state
+                    continue
+                if user_id in self._pending:
+                    self.coalesced += 1
+                self._pending[user_id] = state
+                self.buffered += 1
+                snapshot = dict(state)
+                over_limit = len(self._pending) > PROGRESS_BUFFER_MAX_DIRTY
+            break
+        if over_limit:
+            self.flush(db)
+        return snapshot
+
+    def _current(self, user_id: str) -> Optional[dict]:
+        """The newest unsaved state, pending or being flushed; call with _lock held"""
+        state = self._pending.get(user_id)
+        return state if state is not None else self._flushing.get(user_id)
+
+    def get(self, user_id: str) -> Optional[dict]:
+        """Unsaved progress for a user, if any"""
+        with self._lock:
+            state = self._current(user_id)
+            return dict(state) if state is not None else None
+
+    def take(self, user_id: str) -> Optional[dict]:
+        """Remove and return a user's unsaved progress so the caller can write it.
+
+        Waits for a flush in progress, so the caller's write cannot be overwritten by it.
+        """
+        with self._flush_lock, self._lock:
+            return self._pending.pop(user_id, None)
+
+    def flush(self, db: Session) -> int:
+        """Write every pending entry in batched UPDATEs; entries are restored if the write fails"""
+        with self._flush_lock:
+            return self._flush(db)
+
+    def _flush(self, db: Session) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushing = pending
+        if not pending:
+            return 0
+        stmt = (
+            update(GameProgress.__table__)
+            .where(GameProgress.__table__.c.user_id == bindparam("target_user_id"))
+            .values({name: bindparam(name) for name in FLUSHED_COLUMNS})
+        )
+        rows = [
+            {"target_user_id": user_id, **{name: state[name] for name in FLUSHED_COLUMNS}}
+            for user_id, state in pending.items()
+        ]
+        try:
+            for offset in range(0, len(rows), PROGRESS_FLUSH_BATCH_SIZE):
+                db.connection().execute(stmt, rows[offset:offset + PROGRESS_FLUSH_BATCH_SIZE])
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                # Newer updates made during the failed flush win over the restored ones
+                for user_id, state in pending.items():
+                    self._pending.setdefault(user_id, state)
+                self._flushing = {}
+            self.flush_errors += 1
+            raise
+        with self._lock:
+            self._flushing = {}
+        self.flushes += 1
+        self.rows_flushed += len(rows)
+        return len(rows)
+
+    def _flush_in_session(self) -> None:
+        db = SessionLocal()
+        try:
+            self.flush(db)
+        except Exception as e:
+            logger.error(f"Failed to flush buffered game progress: {e}")
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(PROGRESS_FLUSH_INTERVAL_SECONDS)
+            await run_in_threadpool(self._flush_in_session)
+
+    def start(self) -> None:
+        """Start the periodic flush task on the running event loop"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Game progress write-behind enabled, flushing every {PROGRESS_FLUSH_INTERVAL_SECONDS}s")
+
+    async def stop(self) -> None:
+        """Stop the flush task and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await run_in_threadpool(self._flush_in_session)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "dirty": len(self._pending),
+            "writes_buffered": self.buffered,
+            "writes_coalesced": self.coalesced,
+            "rows_flushed": self.rows_flushed,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+        }
+
+
+progress_buffer = ProgressBuffer(PROGRESS_WRITE_BEHIND)
+register_metrics("progress_write_behind", progress_buffer.stats)
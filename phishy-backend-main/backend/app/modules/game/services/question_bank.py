@@ -0,0 +1,166 @@
+import glob
+import gzip
+import json
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from app.modules.learning_path.models.learn_path import Topics
+from app.utils.etag import weak_etag
+from app.utils.logger import get_logger
+from app.utils.metrics import register_metrics
+import os
+
+logger = get_logger("question_bank.py")
+
+# Directory of questions.v<N>.json files; the highest version is served unless QUESTION_BANK_VERSION pins one
+QUESTION_BANK_DIR = os.getenv(
+    "QUESTION_BANK_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "question_bank"),
+)
+QUESTION_BANK_VERSION = os.getenv("QUESTION_BANK_VERSION")
+
+_FILE_PATTERN = re.compile(r"^questions\.v(\d+)\.json$")
+
+
+class Question(NamedTuple):
+    question_id: str
+    topic: Topics
+    subcategory: str
+    question: str
+    choices: Tuple[str, ...]
+    answer: str
+
+
+class Grade(NamedTuple):
+    correct_answer: str
+    is_correct: bool
+
+
+class QuestionBody(NamedTuple):
+    """A question list serialized once at load: its ETag, JSON and gzip bytes"""
+    etag: str
+    body: bytes
+    gzipped: bytes
+
+
+def _parse_bank(data: dict, path: str) -> List[Question]:
+    """Validate a bank file's contents, raising ValueError with the offending question"""
+    questions = []
+    seen = set()
+    for entry in data.get("topics", []):
+        try:
+            topic = Topics(entry["topic"])
+        except ValueError:
+            raise ValueError(f"{path}: unknown topic {entry['topic']!r}")
+        for item in entry.get("questions", []):
+            question = Question(
+                question_id=item["question_id"],
+                topic=topic,
+                subcategory=item["subcategory"],
+                question=item["question"],
+                choices=tuple(item["choices"]),
+                answer=item["answer"],
+            )
+            if question.question_id in seen:
+                raise ValueError(f"{path}: duplicate question_id {question.question_id!r}")
+            if question.answer not in question.choices:
+                raise ValueError(f"{path}: answer of {question.question_id!r} is not one of its choices")
+            seen.add(question.question_id)
+            questions.append(question)
+    return questions
+
+
+class QuestionBank:
+    """Assessment questions loaded once from disk, indexed by id, topic and (topic, subcategory).
+
+    Question lists are served from bodies serialized and gzipped at load, and answers are graded
+    from the id index, so neither touches the database.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._by_id: Dict[str, Question] = {}
+        self._bodies: Dict[Tuple[Optional[Topics], Optional[str]], QuestionBody] = {}
+        self._lock = threading.Lock()
+        self.graded = 0
+
+    def load(self, directory: str = QUESTION_BANK_DIR, version: Optional[str] = QUESTION_BANK_VERSION) -> None:
+        """Load the newest (or the pinned) questions.v<N>.json from directory"""
+        files = {}
+        for path in glob.glob(os.path.join(directory, "questions.v*.json")):
+            match = _FILE_PATTERN.match(os.path.basename(path))
+            if match:
+                files[int(match.group(1))] = path
+        if version is not None:
+            if int(version) not in files:
+                raise ValueError(f"Question bank version {version} not found in {directory}")
+            chosen = int(version)
+        elif files:
+            chosen = max(files)
+        else:
+            logger.warning(f"No question bank found in {directory}; answers must be graded by the client")
+            return
+
+        with open(files[chosen], encoding="utf-8") as bank_file:
+            questions = _parse_bank(json.load(bank_file), files[chosen])
+
+        by_id = {question.question_id: question for question in questions}
+        groups: Dict[Tuple[Optional[Topics], Optional[str]], List[Question]] = {(None, None): questions}
+        for question in questions:
+            groups.setdefault((question.topic, None), []).append(question)
+            groups.setdefault((question.topic, question.subcategory), []).append(question)
+        bodies = {key: self._serialize(chosen, key, group) for key, group in groups.items()}
+
+        with self._lock:
+            self.version = chosen
+            self._by_id = by_id
+            self._bodies = bodies
+        logger.info(f"Loaded question bank v{chosen}: {len(questions)} questions")
+
+    @staticmethod
+    def _serialize(version: int, key: Tuple[Optional[Topics], Optional[str]], questions: List[Question]) -> QuestionBody:
+        topic, subcategory = key
+        body = json.dumps({
+            "version": version,
+            "topic": topic.value if topic else None,
+            "subcategory": subcategory,
+            # Answers stay on the server
+            "questions": [
+                {
+                    "question_id": question.question_id,
+                    "topic": question.topic.value,
+                    "subcategory": question.subcategory,
+                    "question": question.question,
+                    "choices": list(question.choices),
+                }
+                for question in questions
+            ],
+        }, separators=(",", ":")).encode()
+        return QuestionBody(weak_etag(version, body), body, gzip.compress(body, mtime=0))
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    def body(self, topic: Optional[Topics] = None, subcategory: Optional[str] = None) -> Optional[QuestionBody]:
+        """Serialized questions for a topic (and subcategory), all questions for no topic; None if there are none"""
+        return self._bodies.get((topic, subcategory))
+
+    def get(self, question_id: str) -> Optional[Question]:
+        return self._by_id.get(question_id)
+
+    def grade(self, question_id: str, user_answer: str) -> Optional[Grade]:
+        """Grade an answer, or None if the question is not in the bank"""
+        question = self._by_id.get(question_id)
+        if question is None:
+            return None
+        with self._lock:
+            self.graded += 1
+        return Grade(question.answer, user_answer == question.answer)
+
+    def stats(self) -> dict:
+        return {"version": self.version, "questions": len(self._by_id), "answers_graded": self.graded}
+
+
+question_bank = QuestionBank()
+register_metrics("question_bank", question_bank.stats)
@@ -0,0 +1,83 @@
+import zlib
+from typing import Optional, Set
+from sqlalchemy.orm import Session
+from app.modules.game.models.game import GameProgress
+from app.utils.blob_store import LocalBlobStore
+from app.utils.logger import get_logger
+import os
+
+logger = get_logger("save_data.py")
+
+# Compression level for stored save data (1 = fastest, 9 = smallest)
+SAVE_COMPRESSION_LEVEL = int(os.getenv("SAVE_COMPRESSION_LEVEL", "6"))
+
+# "local" keeps save snapshots in a content-addressed directory and only their hash in the row
+SAVE_BLOB_STORE = os.getenv("SAVE_BLOB_STORE", "")
+SAVE_BLOB_DIR = os.getenv("SAVE_BLOB_DIR", "./save_blobs")
+# Unreferenced blobs younger than this are kept, as their rows may not be committed yet
+SAVE_BLOB_GC_MIN_AGE_SECONDS = float(os.getenv("SAVE_BLOB_GC_MIN_AGE_SECONDS", "3600"))
+
+blob_store: Optional[LocalBlobStore] = LocalBlobStore(SAVE_BLOB_DIR) if SAVE_BLOB_STORE == "local" else None
+
+# First byte of every stored blob; new formats get a new value so old rows stay readable
+SAVE_FORMAT_ZLIB = 1
+
+def encode_save(save_data: str) -> bytes:
+    """Compress game-state JSON for storage"""
+    return bytes([SAVE_FORMAT_ZLIB]) + zlib.compress(save_data.encode(), SAVE_COMPRESSION_LEVEL)
+
+def decode_save(blob: bytes) -> str:
+    """Decompress a stored blob back to game-state JSON"""
+    if blob[0] == SAVE_FORMAT_ZLIB:
+        return zlib.decompress(blob[1:]).decode()
+    raise ValueError(f"Unknown save data format: {blob[0]}")
+
+def save_columns(save_data: Optional[str]) -> dict:
+    """Column values storing save_data: compressed in the row, or in the blob store with a hash reference"""
+    if save_data is None:
+        return {"save_data": None, "save_blob": None, "save_ref": None}
+    blob = encode_save(save_data)
+    if SAVE_BLOB_STORE == "local":
+        return {"save_data": None, "save_blob": None, "save_ref": _store().put(blob)}
+    return {"save_data": None, "save_blob": blob, "save_ref": None}
+
+def read_save(save_blob: Optional[bytes], save_data: Optional[str], save_ref: Optional[str] = None) -> Optional[str]:
+    """Game-state JSON of a progress row, whether stored by reference, compressed, or as legacy text"""
+    if save_ref is not None:
+        with _store().mapped(save_ref) as mapped:
+            if mapped[0] != SAVE_FORMAT_ZLIB:
+                raise ValueError(f"Unknown save data format: {mapped[0]}")
+            # Decompress straight from the mapping without copying the blob
+            return zlib.decompress(memoryview(mapped)[1:]).decode()
+    if save_blob is not None:
+        return decode_save(save_blob)
+    return save_data
+
+def deflate_save(save_blob: Optional[bytes], save_data: Optional[str], save_ref: Optional[str] = None) -> Optional[bytes]:
+    """Save data as an HTTP deflate (zlib) body, reusing the stored bytes when possible"""
+    if save_ref is not None:
+        with _store().mapped(save_ref) as mapped:
+            if mapped[0] == SAVE_FORMAT_ZLIB:
+                return mapped[1:]
+    if save_blob is not None and save_blob[0] == SAVE_FORMAT_ZLIB:
+        return save_blob[1:]
+    text = read_save(save_blob, save_data, save_ref)
+    return zlib.compress(text.encode(), SAVE_COMPRESSION_LEVEL) if text is not None else None
+
+def _store() -> LocalBlobStore:
+    # Rows may reference blobs even after the store is switched off, so reads always find it
+    global blob_store
+    if blob_store is None:
+        blob_store = LocalBlobStore(SAVE_BLOB_DIR)
+    return blob_store
+
+def collect_save_blobs(db: Session) -> int:
+    """Delete stored save snapshots no progress row references any more"""
+    if SAVE_BLOB_STORE != "local":
+        return 0
+    referenced: Set[str] = {
+        ref for (ref,) in db.query(GameProgress.save_ref).filter(GameProgress.save_ref.isnot(None)).distinct()
+    }
+    deleted = _store().collect_garbage(referenced, SAVE_BLOB_GC_MIN_AGE_SECONDS)
+    logger.info(f"Save blob garbage collection removed {deleted} blobs, {len(referenced)} referenced")
+    return deleted
@@ -0,0 +1,113 @@
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List
+from sqlalchemy import delete, or_
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.modules.game.models.game import ALL_LEVELS, GameScore, ScoreBucket
+from app.utils.logger import get_logger
+import os
+
+logger = get_logger("score_buckets.py")
+
+# How many past buckets are kept per period
+SCORE_BUCKET_DAYS_KEPT = int(os.getenv("SCORE_BUCKET_DAYS_KEPT", "14"))
+SCORE_BUCKET_WEEKS_KEPT = int(os.getenv("SCORE_BUCKET_WEEKS_KEPT", "12"))
+SCORE_BUCKET_EXPIRE_INTERVAL_SECONDS = 3600
+# Rows per multi-row upsert, well under SQLite's bound-parameter limit
+UPSERT_CHUNK_ROWS = 500
+
+PERIODS = ("day", "week")
+
+_last_expiry = 0.0
+
+def bucket_start(period: str, when: datetime) -> datetime:
+    """Start (UTC midnight, weeks starting Monday) of the bucket containing when"""
+    day = when.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day if period == "day" else day - timedelta(days=day.weekday())
+
+def _retention_cutoff(period: str, now: datetime) -> datetime:
+    if period == "day":
+        return bucket_start("day", now) - timedelta(days=SCORE_BUCKET_DAYS_KEPT - 1)
+    return bucket_start("week", now) - timedelta(weeks=SCORE_BUCKET_WEEKS_KEPT - 1)
+
+def record_score_buckets(db: Session, scores: Iterable[GameScore]) -> None:
+    """Fold flushed scores into their day and week buckets, keeping the best per user and level"""
+    best = {}
+    for score in scores:
+        rank = (-score.score, score.created_at, score.id)
+        for period in PERIODS:
+            start = bucket_start(period, score.created_at)
+            for level in {score.level, ALL_LEVELS}:
+                key = (period, start, level, score.user_id)
+                if key not in best or rank < best[key][0]:
+                    best[key] = (rank, score)
+    if not best:
+        return
+
+    rows = [
+        {
+            "period": period,
+            "bucket_start": start,
+            "level": level,
+            "user_id": user_id,
+            "best_score": score.score,
+            "score_id": score.id,
+            "achieved_at": score.created_at,
+        }
+        for (period, start, level, user_id), (_, score) in sorted(best.items(), key=lambda item: item[0])
+    ]
+    for offset in range(0, len(rows), UPSERT_CHUNK_ROWS):
+        stmt = dialect_insert(db, ScoreBucket).values(rows[offset:offset + UPSERT_CHUNK_ROWS])
+        # Ties keep the earlier score, matching the leaderboard order
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[ScoreBucket.period, ScoreBucket.bucket_start, ScoreBucket.level, ScoreBucket.user_id],
+            set_={
+                "best_score": stmt.excluded.best_score,
+                "score_id": stmt.excluded.score_id,
+                "achieved_at": stmt.excluded.achieved_at,
+            },
+            where=stmt.excluded.best_score > ScoreBucket.best_score,
+        ))
+
+def expire_score_buckets(db: Session, force: bool = False) -> None:
+    """Delete buckets past their retention, at most once per interval unless forced"""
+    global _last_expiry
+    if not force and time.monotonic() - _last_expiry < SCORE_BUCKET_EXPIRE_INTERVAL_SECONDS:
+        return
+    _last_expiry = time.monotonic()
+    now = datetime.utcnow()
+    deleted = db.execute(delete(ScoreBucket).where(or_(*(
+        (ScoreBucket.period == period) & (ScoreBucket.bucket_start < _retention_cutoff(period, now))
+        for period in PERIODS
+    )))).rowcount
+    db.commit()
+    if deleted:
+        logger.info(f"Expired {deleted} score buckets")
+
+def init_score_buckets(db: Session) -> None:
+    """Expire old buckets and backfill retained ones when scores predate the table"""
+    expire_score_buckets(db, force=True)
+    if db.query(ScoreBucket.user_id).first() is not None:
+        return
+    since = min(_retention_cutoff(period, datetime.utcnow()) for period in PERIODS)
+    scores = db.query(GameScore).filter(GameScore.created_at >= since).all()
+    if scores:
+        logger.info(f"Backfilling score buckets from {len(scores)} scores")
+        record_score_buckets(db, scores)
+        db.commit()
+
+def get_window_top(db: Session, period: str, level: int, limit: int) -> List[GameScore]:
+    """Each user's best score in the current day or week bucket, best first"""
+    return (
+        db.query(GameScore)
+        .join(ScoreBucket, ScoreBucket.score_id == GameScore.id)
+        .filter(
+            ScoreBucket.period == period,
+            ScoreBucket.bucket_start == bucket_start(period, datetime.utcnow()),
+            ScoreBucket.level == level,
+        )
+        .order_by(ScoreBucket.best_score.desc(), ScoreBucket.achieved_at, ScoreBucket.user_id)
+        .limit(limit)
+        .all()
+    )
@@ -0,0 +1,216 @@
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+from sqlalchemy import and_, delete, func, insert, literal, or_, select
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.modules.game.models.game import ALL_LEVELS, GameScore, UserBestScore
+from app.modules.game.services.leaderboard import leaderboard
+from app.modules.game.services.leaderboard_stream import LeaderboardStream, LEADERBOARD_STREAM_SIZE
+from app.modules.game.services.score_buckets import expire_score_buckets, get_window_top, record_score_buckets
+from app.utils.etag import weak_etag
+from app.utils.logger import get_logger
+from app.utils.metrics import register_metrics
+import os
+
+logger = get_logger("scores.py")
+
+# "memory" serves rankings from the in-process leaderboard, "database" queries game_scores directly
+LEADERBOARD_BACKEND = os.getenv("LEADERBOARD_BACKEND", "memory")
+LEADERBOARD_MAX_LIMIT = 100
+# Largest accepted POST /game/scores/batch
+SCORE_BATCH_MAX_SIZE = int(os.getenv("SCORE_BATCH_MAX_SIZE", "100"))
+
+class LeaderboardWindow(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    ALL = "all"
+
+LEADERBOARD_ORDER = (GameScore.score.desc(), GameScore.created_at, GameScore.id)
+
+def score_to_dict(score: GameScore) -> dict:
+    """Serialize a score for GameScoreResponse"""
+    return {
+        "id": score.id,
+        "user_id": score.user_id,
+        "score": score.score,
+        "level": score.level,
+        "enemies_defeated": score.enemies_defeated,
+        "chests_collected": score.chests_collected,
+        "time_taken": score.time_taken,
+        "created_at": score.created_at.isoformat() if score.created_at else None,
+    }
+
+leaderboard_stream = LeaderboardStream(leaderboard, score_to_dict, LEADERBOARD_STREAM_SIZE)
+register_metrics("leaderboard_stream", leaderboard_stream.stats)
+
+def create_game_score(db: Session, user_id: str, score_data: dict) -> GameScore:
+    """Save a score, updating best scores and buckets in the same transaction, and add it to the leaderboard"""
+    new_score = GameScore(user_id=user_id, **score_data)
+    db.add(new_score)
+    db.flush()
+    _record_best_scores(db, [new_score])
+    record_score_buckets(db, [new_score])
+    db.commit()
+    db.refresh(new_score)
+    leaderboard.add(new_score.id, new_score.user_id, new_score.score, new_score.created_at)
+    leaderboard_stream.scores_added(db, [new_score])
+    expire_score_buckets(db)
+    return new_score
+
+def create_game_scores(db: Session, user_id: str, scores_data: List[dict]) -> List[GameScore]:
+    """Save many scores with one bulk INSERT in one transaction, updating derived state once"""
+    now = datetime.utcnow()
+    rows = [
+        {"id": str(uuid.uuid4()), "user_id": user_id, "created_at": now, **score_data}
+        for score_data in scores_data
+    ]
+    if not rows:
+        return []
+    db.execute(insert(GameScore), rows)
+    # Detached objects carry the stored values to the derived tables and the response
+    new_scores = [GameScore(**row) for row in rows]
+    _record_best_scores(db, new_scores)
+    record_score_buckets(db, new_scores)
+    db.commit()
+    for score in new_scores:
+        leaderboard.add(score.id, score.user_id, score.score, score.created_at)
+    leaderboard_stream.scores_added(db, new_scores)
+    expire_score_buckets(db)
+    logger.info(f"Saved {len(rows)} game scores for user {user_id}")
+    return new_scores
+
+def _record_best_scores(db: Session, scores: List[GameScore]) -> None:
+    """Upsert scores into user_best_scores for their level and for ALL_LEVELS where they beat the stored best"""
+    best = {}
+    for score in scores:
+        rank = (-score.score, score.created_at, score.id)
+        for level in {score.level, ALL_LEVELS}:
+            key = (score.user_id, level)
+            if key not in best or rank < best[key][0]:
+                best[key] = (rank, score)
+    if not best:
+        return
+
+    stmt = dialect_insert(db, UserBestScore).values([
+        {
+            "user_id": user_id,
+            "level": level,
+            "best_score": score.score,
+            "score_id": score.id,
+            "achieved_at": score.created_at,
+        }
+        for (user_id, level), (_, score) in sorted(best.items(), key=lambda item: item[0])
+    ])
+    # Ties keep the earlier score, matching the leaderboard order
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserBestScore.user_id, UserBestScore.level],
+        set_={
+            "best_score": stmt.excluded.best_score,
+            "score_id": stmt.excluded.score_id,
+            "achieved_at": stmt.excluded.achieved_at,
+        },
+        where=stmt.excluded.best_score > UserBestScore.best_score,
+    ))
+
+def rebuild_user_best_scores(db: Session) -> None:
+    """Recompute user_best_scores from game_scores"""
+    logger.info("Rebuilding user best scores")
+    db.execute(delete(UserBestScore))
+    for partition, level in (
+        ((GameScore.user_id, GameScore.level), GameScore.level),
+        ((GameScore.user_id,), literal(ALL_LEVELS)),
+    ):
+        # Scores saved before levels were validated may carry level 0, which would collide with ALL_LEVELS
+        ranked = select(
+            GameScore.user_id, level.label("level"), GameScore.score, GameScore.id, GameScore.created_at,
+            func.row_number().over(partition_by=partition, order_by=LEADERBOARD_ORDER).label("position"),
+        ).where(GameScore.level >= 1).subquery()
+        db.execute(insert(UserBestScore).from_select(
+            ["user_id", "level", "best_score", "score_id", "achieved_at"],
+            select(ranked.c.user_id, ranked.c.level, ranked.c.score, ranked.c.id, ranked.c.created_at)
+            .where(ranked.c.position == 1),
+        ))
+    db.commit()
+
+def init_best_scores(db: Session) -> None:
+    """Backfill user_best_scores when scores predate the table"""
+    if db.query(UserBestScore.user_id).first() is None and db.query(GameScore.id).first() is not None:
+        rebuild_user_best_scores(db)
+
+def get_user_scores(db: Session, user_id: str) -> List[GameScore]:
+    return db.query(GameScore).filter(GameScore.user_id == user_id).order_by(*LEADERBOARD_ORDER).all()
+
+def user_scores_etag(db: Session, user_id: str) -> str:
+    """Weak ETag of a user's score list; scores are only ever added, so the count and latest time identify it"""
+    count, latest = db.query(func.count(GameScore.id), func.max(GameScore.created_at)).filter(
+        GameScore.user_id == user_id
+    ).one()
+    return weak_etag(user_id, count, latest)
+
+def get_top_scores(
+    db: Session,
+    limit: int = 10,
+    window: Optional[LeaderboardWindow] = None,
+    level: Optional[int] = None,
+) -> List[GameScore]:
+    """Best scores across all users, ordered by score, then earliest submission.
+
+    With a window or level, returns each player's best score in that window (default all-time) instead.
+    """
+    limit = min(max(1, limit), LEADERBOARD_MAX_LIMIT)
+    if window is not None or level is not None:
+        if window in (None, LeaderboardWindow.ALL):
+            return get_top_players(db, level, limit)
+        return get_window_top(db, window.value, ALL_LEVELS if level is None else level, limit)
+    if LEADERBOARD_BACKEND == "database":
+        return db.query(GameScore).order_by(*LEADERBOARD_ORDER).limit(limit).all()
+
+    leaderboard.ensure_fresh(db)
+    ids = leaderboard.top_ids(limit)
+    scores = {score.id: score for score in db.query(GameScore).filter(GameScore.id.in_(ids))}
+    return [scores[score_id] for score_id in ids if score_id in scores]
+
+def get_top_players(db: Session, level: Optional[int] = None, limit: int = 10) -> List[GameScore]:
+    """Each user's best score (overall, or for one level), best first, one entry per user"""
+    limit = min(max(1, limit), LEADERBOARD_MAX_LIMIT)
+    return (
+        db.query(GameScore)
+        .join(UserBestScore, UserBestScore.score_id == GameScore.id)
+        .filter(UserBestScore.level == (ALL_LEVELS if level is None else level))
+        .order_by(UserBestScore.best_score.desc(), UserBestScore.achieved_at, UserBestScore.user_id)
+        .limit(limit)
+        .all()
+    )
+
+def get_score_rank(db: Session, score: int) -> dict:
+    """Rank a score would take on the leaderboard"""
+    if LEADERBOARD_BACKEND == "database":
+        rank = db.query(func.count(GameScore.id)).filter(GameScore.score > score).scalar() + 1
+        total = db.query(func.count(GameScore.id)).scalar()
+    else:
+        leaderboard.ensure_fresh(db)
+        rank, total = leaderboard.rank_of_score(score), len(leaderboard)
+    return {"score": score, "rank": rank, "total": total}
+
+def get_user_rank(db: Session, user_id: str) -> Optional[dict]:
+    """Rank of a user's best score, or None if they have no scores"""
+    if LEADERBOARD_BACKEND == "database":
+        best = db.query(GameScore).filter(GameScore.user_id == user_id).order_by(*LEADERBOARD_ORDER).first()
+        if best is None:
+            return None
+        ahead = db.query(func.count(GameScore.id)).filter(or_(
+            GameScore.score > best.score,
+            and_(GameScore.score == best.score, GameScore.created_at < best.created_at),
+            and_(GameScore.score == best.score, GameScore.created_at == best.created_at, GameScore.id < best.id),
+        )).scalar()
+        best_score, rank = best.score, ahead + 1
+        total = db.query(func.count(GameScore.id)).scalar()
+    else:
+        leaderboard.ensure_fresh(db)
+        ranked = leaderboard.rank_of_user(user_id)
+        if ranked is None:
+            return None
+        (best_score, rank), total = ranked, len(leaderboard)
+    return {"score": best_score, "rank": rank, "total": total}
@@ -8,8 +8,12 @@ from app.modules.learning_path.services.learn_path_service import (
     create_learning_path, 
     get_user_learning_paths, 
     update_learning_path_score, 
-    mark_learning_path_completed
+    mark_learning_path_completed,
+    learning_paths_etag,
+    check_learning_paths_match,
+    learning_path_to_dict
 )
+from app.utils.etag import ConditionalRequest, PreconditionFailed
 from app.utils.logger import get_logger
 from pydantic import BaseModel
 from typing import List, Optional
@@ -48,20 +52,27 @@ def create_new_learning_path(
 ):
     """Create a new learning path entry for the current user"""
     logger.info(f"Creating learning path for user {current_user.userid}")
-    return create_learning_path(db, current_user.userid, learning_path.topic, learning_path.subtopic, learning_path.score)
+    return learning_path_to_dict(
+        create_learning_path(db, current_user.userid, learning_path.topic, learning_path.subtopic, learning_path.score)
+    )
 
 @router.get("/", response_model=List[LearningPathResponse])
 def get_my_learning_paths(
+    conditional: ConditionalRequest = Depends(),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get all learning paths for the current user"""
     logger.info(f"Getting learning paths for user {current_user.userid}")
-    return get_user_learning_paths(db, current_user.userid)
+    not_modified = conditional.not_modified(learning_paths_etag(db, current_user.userid))
+    if not_modified:
+        return not_modified
+    return [learning_path_to_dict(path) for path in get_user_learning_paths(db, current_user.userid)]
 
 @router.get("/{user_id}", response_model=List[LearningPathResponse])
 def get_user_learning_paths_by_id(
     user_id: str,
+    conditional: ConditionalRequest = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -75,31 +86,46 @@ def get_user_learning_paths_by_id(
             detail="Access denied. You can only view your own learning paths"
         )
     
-    return get_user_learning_paths(db, user_id)
+    not_modified = conditional.not_modified(learning_paths_etag(db, user_id))
+    if not_modified:
+        return not_modified
+    return [learning_path_to_dict(path) for path in get_user_learning_paths(db, user_id)]
 
 @router.put("/{path_id}/score", response_model=LearningPathResponse)
 def update_learning_path_score_endpoint(
     path_id: str,
     update_data: LearningPathUpdate,
+    conditional: ConditionalRequest = Depends(),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update the score of a learning path"""
     logger.info(f"Updating learning path {path_id} score to {update_data.score}")
-    result = update_learning_path_score(db, path_id, update_data.score)
+    try:
+        expected = check_learning_paths_match(db, path_id, conditional.if_match)
+        result = update_learning_path_score(db, path_id, update_data.score, expected)
+    except PreconditionFailed:
+        raise HTTPException(status_code=412, detail="Learning paths have changed since they were read")
     if not result:
         raise HTTPException(status_code=404, detail="Learning path not found")
-    return result
+    conditional.set_etag(learning_paths_etag(db, result.user_id))
+    return learning_path_to_dict(result)
 
 @router.put("/{path_id}/complete", response_model=LearningPathResponse)
 def mark_learning_path_completed_endpoint(
     path_id: str,
+    conditional: ConditionalRequest = Depends(),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Mark a learning path as completed"""
     logger.info(f"Marking learning path {path_id} as completed")
-    result = mark_learning_path_completed(db, path_id)
+    try:
+        expected = check_learning_paths_match(db, path_id, conditional.if_match)
+        result = mark_learning_path_completed(db, path_id, expected)
+    except PreconditionFailed:
+        raise HTTPException(status_code=412, detail="Learning paths have changed since they were read")
     if not result:
         raise HTTPException(status_code=404, detail="Learning path not found")
-    return result
+    conditional.set_etag(learning_paths_etag(db, result.user_id))
+    return learning_path_to_dict(result)
@@ -1,6 +1,9 @@
 # takes in the topic value, the grades in a list format
 from ..models.learn_path import Topics, SubtopicPriority, UserLearnPath
-from sqlalchemy.orm import Session
+from typing import Optional, Tuple
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, aliased
+from app.utils.etag import PreconditionFailed, etag_matches, weak_etag
 from app.utils.logger import get_logger
 from datetime import datetime
 
@@ -14,6 +17,21 @@ def score_to_priority(score: float) -> SubtopicPriority:
     else:
         return SubtopicPriority.LOW
 
+def learning_path_to_dict(path: UserLearnPath) -> dict:
+    """Serialize a learning path for LearningPathResponse"""
+    return {
+        "id": path.id,
+        "user_id": path.user_id,
+        "topic": path.topic.value,
+        "subtopic": path.subtopic,
+        "priority": path.priority.value,
+        "score": path.score,
+        "completed": path.completed,
+        "created_at": path.created_at.isoformat() if path.created_at else None,
+        "updated_at": path.updated_at.isoformat() if path.updated_at else None,
+        "notes": path.notes,
+    }
+
 def evaluate_subcategory(topic: Topics, subcat_results: dict):
     subcat_priorities = {}
     for subcat, score in subcat_results.items():
@@ -44,35 +62,83 @@ def get_user_learning_paths(db: Session, user_id: str):
     logger.info(f"Retrieving learning paths for user {user_id}")
     return db.query(UserLearnPath).filter(UserLearnPath.user_id == user_id).all()
 
-def update_learning_path_score(db: Session, path_id: str, new_score: float):
+def learning_paths_version(db: Session, user_id: str) -> Tuple[int, Optional[datetime]]:
+    """(count, latest updated_at) of a user's learning paths, which their ETag is computed from"""
+    count, latest = db.query(func.count(UserLearnPath.id), func.max(UserLearnPath.updated_at)).filter(
+        UserLearnPath.user_id == user_id
+    ).one()
+    return count, latest
+
+def learning_paths_etag(db: Session, user_id: str) -> str:
+    """Weak ETag of a user's learning paths, from their count and latest update"""
+    return weak_etag(user_id, *learning_paths_version(db, user_id))
+
+def get_learning_path_owner(db: Session, path_id: str):
+    """The user_id a learning path belongs to, or None if it does not exist"""
+    return db.query(UserLearnPath.user_id).filter(UserLearnPath.id == path_id).scalar()
+
+def check_learning_paths_match(db: Session, path_id: str, if_match: Optional[str]) -> Optional[tuple]:
+    """Check If-Match on a path update against the ETag GET /learning-path/ returns for the owner's paths.
+
+    Returns the (owner, count, latest) version the update must still find, or None without if_match or
+    for a missing path. Raises PreconditionFailed if if_match names another version.
+    """
+    if if_match is None:
+        return None
+    owner = get_learning_path_owner(db, path_id)
+    if owner is None:
+        return None
+    count, latest = learning_paths_version(db, owner)
+    if not etag_matches(if_match, weak_etag(owner, count, latest)):
+        raise PreconditionFailed()
+    return owner, count, latest
+
+def _update_path(db: Session, path_id: str, values: dict, expected: Optional[tuple] = None):
+    """Update one path in one UPDATE ... RETURNING, or return None if it does not exist.
+
+    With expected from check_learning_paths_match, the owner's paths must still be at that version,
+    else PreconditionFailed is raised and nothing is written.
+    """
+    conditions = [UserLearnPath.id == path_id]
+    if expected is not None:
+        owner, count, latest = expected
+        siblings = aliased(UserLearnPath)
+        conditions += [
+            UserLearnPath.user_id == owner,
+            select(func.count(siblings.id)).where(siblings.user_id == owner).scalar_subquery() == count,
+            select(func.max(siblings.updated_at)).where(siblings.user_id == owner).scalar_subquery() == latest,
+        ]
+    stmt = (
+        update(UserLearnPath)
+        .where(*conditions)
+        .values(**values, updated_at=datetime.utcnow())
+        .returning(UserLearnPath)
+    )
+    path = db.scalars(stmt, execution_options={"populate_existing": True}).one_or_none()
+    if path is None:
+        db.rollback()
+        if expected is not None and get_learning_path_owner(db, path_id) is not None:
+            raise PreconditionFailed()
+        return None
+    # Detach so the commit does not expire the returned values and cost another SELECT
+    db.expunge(path)
+    db.commit()
+    return path
+
+def update_learning_path_score(db: Session, path_id: str, new_score: float, expected: Optional[tuple] = None):
     """Update the score and priority of a learning path"""
     logger.info(f"Updating learning path {path_id} with score {new_score}")
     
-    path = db.query(UserLearnPath).filter(UserLearnPath.id == path_id).first()
-    if not path:
-        return None
-    
-    path.score = new_score
-    path.priority = score_to_priority(new_score)
-    path.updated_at = datetime.utcnow()
-    
-    db.commit()
-    db.refresh(path)
-    logger.info(f"Learning path updated: {path_id}")
+    path = _update_path(db, path_id, {"score": new_score, "priority": score_to_priority(new_score)}, expected)
+    if path:
+        logger.info(f"Learning path updated: {path_id}")
     return path
 
-def mark_learning_path_completed(db: Session, path_id: str):
+def mark_learning_path_completed(db: Session, path_id: str, expected: Optional[tuple] = None):
     """Mark a learning path as completed"""
     logger.info(f"Marking learning path {path_id} as completed")
     
-    path = db.query(UserLearnPath).filter(UserLearnPath.id == path_id).first()
-    if not path:
-        return None
-    
-    path.completed = 2  # 2 = completed
-    path.updated_at = datetime.utcnow()
-    
-    db.commit()
-    db.refresh(path)
-    logger.info(f"Learning path marked as completed: {path_id}")
+    path = _update_path(db, path_id, {"completed": 2}, expected)  # 2 = completed
+    if path:
+        logger.info(f"Learning path marked as completed: {path_id}")
     return path
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, Enum
+from app.core.database import Base
+from app.modules.user.models.user import AccountStatus, UserRole
+
+class UserStatsSummary(Base):
+    """Incrementally maintained user counts per (role, account_status)"""
+    __tablename__ = "user_stats_summary"
+
+    role = Column(Enum(UserRole), primary_key=True)
+    account_status = Column(Enum(AccountStatus), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    # Token jti, or "user:<userid>" to revoke every token issued to that user before revoked_at
+    key = Column(String, primary_key=True)
+    user_id = Column(String, nullable=True, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)  # rows can be pruned once every affected token has expired
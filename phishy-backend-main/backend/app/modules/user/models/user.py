@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Enum
+from sqlalchemy import Column, String, DateTime, Enum, Index
 from datetime import datetime
 import uuid
 from app.core.database import Base
@@ -25,3 +25,12 @@ class User(Base):
     last_login = Column(DateTime, nullable=True)
     account_status = Column(Enum(AccountStatus), default=AccountStatus.ACTIVE)
     role = Column(Enum(UserRole), default=UserRole.STUDENT)
+
+    # Keyset pagination on (created_at, userid), alone or behind each listing filter
+    __table_args__ = (
+        Index("ix_users_created_at_userid", "created_at", "userid"),
+        Index("ix_users_role_created_at_userid", "role", "created_at", "userid"),
+        Index("ix_users_status_created_at_userid", "account_status", "created_at", "userid"),
+        Index("ix_users_role_status_created_at_userid", "role", "account_status", "created_at", "userid"),
+        Index("ix_users_last_login", "last_login"),
+    )
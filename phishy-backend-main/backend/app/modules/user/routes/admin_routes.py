@@ -1,21 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.auth import require_admin_role, require_super_admin_role, get_current_user_role
 from app.modules.user.schemas.schemas import (
-    UserResponse, UserUpdate, UserStatsResponse, AdminUserResponse
+    UserResponse, UserUpdate, UserStatsResponse, AdminUserResponse, BulkUserReport
 )
 from app.modules.user.services.services import (
-    get_all_users, get_user, admin_update_user, update_user_role, 
-    update_user_status, get_user_statistics, get_users_by_role, 
-    get_users_by_status, delete_user
+    list_users_page, get_user, admin_update_user, update_user_role, 
+    update_user_status, get_user_statistics, delete_user
 )
+from app.modules.user.services.search_index import search_users
+from app.modules.user.services.bulk_provisioning import bulk_create_users, iter_lines
+from app.modules.user.services.export import EXPORTS, stream_export
 from app.modules.user.models.user import User, UserRole, AccountStatus
 from app.utils.logger import get_logger
+from app.utils.metrics import metrics_snapshot
+from app.utils.pagination import set_page_headers
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 logger = get_logger("admin-routes.py")
 
+def users_page_response(db: Session, response: Response, **filters):
+    """Fetch one page of users, putting the paging metadata in the response headers"""
+    try:
+        users, next_cursor, total = list_users_page(db, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, next_cursor, total)
+    return users
+
 @router.get("/stats", response_model=UserStatsResponse)
 def get_admin_stats(
     db: Session = Depends(get_db),
@@ -27,32 +42,80 @@ def get_admin_stats(
 
 @router.get("/users", response_model=list[AdminUserResponse])
 def get_all_users_admin(
+    response: Response,
+    role: UserRole | None = None,
+    status: AccountStatus | None = None,
+    last_login_after: datetime | None = None,
+    last_login_before: datetime | None = None,
+    cursor: str | None = None,
+    limit: int | None = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin_role)
+):
+    """Get a page of users with optional filters (admin only).
+
+    The next page's cursor is returned in the X-Next-Cursor header.
+    """
+    logger.info(f"Admin {current_user.username} requesting users")
+    return users_page_response(
+        db, response, role=role, status=status,
+        last_login_after=last_login_after, last_login_before=last_login_before,
+        cursor=cursor, limit=limit, include_total=include_total
+    )
+
+@router.post("/users/bulk", response_model=BulkUserReport)
+async def bulk_create_users_admin(
+    request: Request,
+    format: str | None = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin_role)
 ):
-    """Get all users (admin only)"""
-    logger.info(f"Admin {current_user.username} requesting all users")
-    return get_all_users(db)
+    """Create users from a streamed CSV or NDJSON upload (admin only)"""
+    logger.info(f"Admin {current_user.username} bulk provisioning users")
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "ndjson" in content_type or "json" in content_type else "csv"
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    return await bulk_create_users(db, iter_lines(request.stream()), format, current_user)
 
 @router.get("/users/role/{role}", response_model=list[AdminUserResponse])
 def get_users_by_role_admin(
     role: UserRole,
+    response: Response,
+    cursor: str | None = None,
+    limit: int | None = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin_role)
 ):
-    """Get users by role (admin only)"""
+    """Get a page of users by role (admin only)"""
     logger.info(f"Admin {current_user.username} requesting users with role: {role.value}")
-    return get_users_by_role(db, role)
+    return users_page_response(db, response, role=role, cursor=cursor, limit=limit)
 
 @router.get("/users/status/{status}", response_model=list[AdminUserResponse])
 def get_users_by_status_admin(
     status: AccountStatus,
+    response: Response,
+    cursor: str | None = None,
+    limit: int | None = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin_role)
 ):
-    """Get users by account status (admin only)"""
+    """Get a page of users by account status (admin only)"""
     logger.info(f"Admin {current_user.username} requesting users with status: {status.value}")
-    return get_users_by_status(db, status)
+    return users_page_response(db, response, status=status, cursor=cursor, limit=limit)
+
+@router.get("/users/search", response_model=list[AdminUserResponse])
+def search_users_admin(
+    q: str,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin_role)
+):
+    """Search users by username or email prefix/substring, best matches first (admin only)"""
+    logger.info(f"Admin {current_user.username} searching users for: {q}")
+    return search_users(db, q, limit)
 
 @router.get("/users/{user_id}", response_model=AdminUserResponse)
 def get_user_admin(
@@ -146,6 +209,34 @@ def get_my_admin_role(current_user: User = Depends(require_admin_role)):
         "account_status": current_user.account_status.value
     }
 
+@router.get("/metrics")
+def get_runtime_metrics(current_user: User = Depends(require_admin_role)):
+    """Get in-process cache and load counters (admin only)"""
+    logger.info(f"Admin {current_user.username} requesting runtime metrics")
+    return metrics_snapshot()
+
+@router.get("/export/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = "ndjson",
+    gzip: bool = False,
+    current_user: User = Depends(require_admin_role)
+):
+    """Stream users, scores or assessment results as NDJSON or CSV (admin only)"""
+    logger.info(f"Admin {current_user.username} exporting {dataset}")
+    if dataset not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {dataset}")
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    
+    filename = f"{dataset}.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else ("text/csv" if format == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        stream_export(dataset, format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # Super admin only routes
 @router.post("/users/create-admin", response_model=AdminUserResponse)
 def create_admin_user(
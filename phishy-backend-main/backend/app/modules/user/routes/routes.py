@@ -1,39 +1,104 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.core.auth import get_current_active_user, require_admin_role
-from app.modules.user.schemas.schemas import UserCreate, UserResponse, UserLogin, LoginResponse
-from app.modules.user.services.services import create_user, get_user, get_all_users, update_user, delete_user, authenticate_user, create_user_token
+from app.core.auth import get_current_active_user, require_admin_role, decode_token, security
+from app.core.login_throttle import login_throttle
+from app.modules.user.schemas.schemas import (
+    UserCreate, UserResponse, UserLogin, LoginResponse,
+    TokenRefreshRequest, TokenRefreshResponse, LogoutRequest
+)
+from app.modules.user.services.services import (
+    create_user_async, get_user, update_user, delete_user, authenticate_user_async,
+    create_user_token, create_user_refresh_token, refresh_user_tokens, logout_user
+)
+from app.modules.user.routes.admin_routes import users_page_response
 from app.modules.user.models.user import User
 from app.utils.logger import get_logger
+from app.utils.password import PasswordHasherBusy
 
 router = APIRouter(prefix="/users", tags=["users"])
 logger = get_logger("users-routes.py")
+
+# Returned instead of queueing when the password hashing pool is saturated
+hasher_busy_exception = HTTPException(
+    status_code=503,
+    detail="Server is busy, please retry shortly",
+    headers={"Retry-After": "1"},
+)
+
 @router.post("/", response_model=UserResponse)
-def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
     logger.info("create new user")
-    return create_user(db, user)
+    try:
+        return await create_user_async(db, user)
+    except PasswordHasherBusy:
+        raise hasher_busy_exception
 
 @router.post("/register", response_model=UserResponse)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     logger.info("register new user")
-    return create_user(db, user)
+    try:
+        return await create_user_async(db, user)
+    except PasswordHasherBusy:
+        raise hasher_busy_exception
 
 @router.post("/login", response_model=LoginResponse)
-def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
+async def login_user(login_data: UserLogin, request: Request, db: Session = Depends(get_db)):
     logger.info("login user")
-    user = authenticate_user(db, login_data)
+    # Shed abusive attempts before any DB query or bcrypt work
+    client_ip = request.client.host if request.client else None
+    retry_after = await login_throttle.check_async(login_data.username, client_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+    try:
+        user = await authenticate_user_async(db, login_data)
+    except PasswordHasherBusy:
+        raise hasher_busy_exception
     if not user:
+        await login_throttle.record_failure_async(login_data.username)
         raise HTTPException(status_code=401, detail="Invalid username or password")
+    await login_throttle.record_success_async(login_data.username)
     
     access_token = create_user_token(user)
     return LoginResponse(
         user=user, 
         access_token=access_token, 
+        refresh_token=create_user_refresh_token(user),
         token_type="bearer",
         message="Login successful"
     )
 
+@router.post("/token/refresh", response_model=TokenRefreshResponse)
+def refresh_token(refresh_data: TokenRefreshRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for new tokens without a bcrypt login"""
+    logger.info("refresh token")
+    tokens = refresh_user_tokens(db, refresh_data.refresh_token)
+    if not tokens:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    access_token, new_refresh_token = tokens
+    return TokenRefreshResponse(access_token=access_token, refresh_token=new_refresh_token, token_type="bearer")
+
+@router.post("/logout")
+def logout(
+    logout_data: LogoutRequest,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Revoke the current access token and, optionally, a refresh token"""
+    logger.info(f"User {current_user.username} logging out")
+    logout_user(db, decode_token(credentials.credentials), logout_data.refresh_token)
+    return {"message": "Logout successful"}
+
 @router.get("/{user_id}", response_model=UserResponse)
 def read_user(
     user_id: str, 
@@ -57,11 +122,14 @@ def read_user(
 
 @router.get("/", response_model=list[UserResponse])
 def read_all_users(
+    response: Response,
+    cursor: str | None = None,
+    limit: int | None = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin_role)
 ):
     logger.info(f"Admin {current_user.username} reading all users")
-    return get_all_users(db)
+    return users_page_response(db, response, cursor=cursor, limit=limit)
 
 @router.put("/{user_id}", response_model=UserResponse)
 def update_existing_user(
@@ -36,6 +36,18 @@ class LoginResponse(BaseModel):
     access_token: str
     token_type: str
     message: str
+    refresh_token: str | None = None
+
+class TokenRefreshRequest(BaseModel):
+    refresh_token: str
+
+class TokenRefreshResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: str | None = None
 
 class AdminUserResponse(UserResponse):
     """Extended user response for admin operations"""
@@ -49,3 +61,16 @@ class UserStatsResponse(BaseModel):
     students: int
     admins: int
     super_admins: int
+
+class BulkUserResult(BaseModel):
+    row: int
+    status: str  # created, conflict or invalid
+    username: str | None = None
+    userid: str | None = None
+    detail: str | None = None
+
+class BulkUserReport(BaseModel):
+    created: int
+    conflicts: int
+    invalid: int
+    results: list[BulkUserResult]
@@ -0,0 +1,212 @@
+import codecs
+import csv
+import json
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Tuple
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.modules.user.models.user import User, UserRole, AccountStatus
+from app.modules.user.schemas.schemas import UserCreate
+from app.modules.user.services.search_index import search_index
+from app.modules.user.services.user_stats import invalidate_user_stats, record_user_change
+from app.utils.logger import get_logger
+from app.utils.password import get_password_hashes_async
+import os
+
+logger = get_logger("bulk_provisioning.py")
+
+# Rows hashed and inserted per transaction
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a stream of byte chunks into text lines without buffering the whole body"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+async def iter_file_lines(lines: Iterable[str]) -> AsyncIterator[str]:
+    """Adapt a plain line iterator (e.g. an open file) for bulk_create_users"""
+    for line in lines:
+        yield line.rstrip("\n")
+
+class _LineFeed:
+    """Lines queued from the upload for a csv.reader to pull, so one reader sees the whole stream"""
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+async def iter_csv(lines: AsyncIterator[str]) -> AsyncIterator[List[str]]:
+    """Parse CSV records from streamed lines; quoted fields may span lines"""
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    quotes = 0
+    async for line in lines:
+        feed.lines.append(line + "\n")
+        quotes += line.count('"')
+        # An odd number of quotes means a quoted field continues on the next line,
+        # so the reader only pulls once the buffered lines end a record
+        if quotes % 2 == 0:
+            quotes = 0
+            for values in reader:
+                yield values
+    # Whatever is left is an unterminated quoted field, read up to the end of the upload
+    for values in reader:
+        yield values
+
+async def iter_rows(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (row_number, parsed row) from CSV with a header line or from NDJSON"""
+    if fmt == "ndjson":
+        row_number = 0
+        async for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line)
+            except ValueError as e:
+                yield row_number, e
+        return
+
+    header = None
+    row_number = 0
+    async for values in iter_csv(lines):
+        if not values or (len(values) == 1 and not values[0].strip()):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        yield row_number, dict(zip(header, values))
+
+async def bulk_create_users(db: Session, lines: AsyncIterator[str], fmt: str, admin_user: User = None) -> dict:
+    """Create users from streamed CSV/NDJSON rows, chunk by chunk, reporting each row's outcome"""
+    logger.info(f"Bulk provisioning users from {fmt} upload")
+    report = {"created": 0, "conflicts": 0, "invalid": 0, "results": []}
+    chunk = []
+    async for row_number, row in iter_rows(lines, fmt):
+        chunk.append((row_number, row))
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await _process_chunk(db, chunk, admin_user, report)
+            chunk = []
+    if chunk:
+        await _process_chunk(db, chunk, admin_user, report)
+    report["results"].sort(key=lambda result: result["row"])
+    logger.info(
+        f"Bulk provisioning done: {report['created']} created, "
+        f"{report['conflicts']} conflicts, {report['invalid']} invalid"
+    )
+    return report
+
+async def _process_chunk(db: Session, chunk: List[tuple], admin_user: User, report: dict) -> None:
+    valid = []
+    for row_number, row in chunk:
+        try:
+            if not isinstance(row, dict):
+                raise ValueError(str(row) if isinstance(row, Exception) else "Row must be an object")
+            user_data = UserCreate(**{k: v for k, v in row.items() if v not in (None, "")})
+            # admin_user is None for the CLI, which runs with full privileges
+            if user_data.role == UserRole.SUPER_ADMIN and admin_user is not None and admin_user.role != UserRole.SUPER_ADMIN:
+                raise ValueError("Only super-admins can create other super-admins")
+        except (ValidationError, ValueError, TypeError) as e:
+            _add_result(report, "invalid", row_number, row.get("username") if isinstance(row, dict) else None, detail=str(e))
+            continue
+        valid.append((row_number, user_data))
+
+    valid = await run_in_threadpool(_drop_conflicts, db, valid, report)
+    hashes = await get_password_hashes_async([user_data.password for _, user_data in valid])
+    await run_in_threadpool(_insert_chunk, db, valid, hashes, report)
+
+def _drop_conflicts(db: Session, valid: List[tuple], report: dict) -> List[tuple]:
+    """Report rows clashing with existing users or earlier rows of the chunk before hashing them"""
+    if not valid:
+        return valid
+    usernames = {user_data.username for _, user_data in valid}
+    emails = {user_data.email for _, user_data in valid}
+    taken = set()
+    for username, email in db.query(User.username, User.email).filter(
+        or_(User.username.in_(usernames), User.email.in_(emails))
+    ):
+        taken.update((("username", username), ("email", email)))
+
+    remaining = []
+    for row_number, user_data in valid:
+        keys = {("username", user_data.username), ("email", user_data.email)}
+        if keys & taken:
+            _add_result(report, "conflict", row_number, user_data.username, detail="Username or email already exists")
+            continue
+        taken.update(keys)
+        remaining.append((row_number, user_data))
+    return remaining
+
+def _insert_chunk(db: Session, valid: List[tuple], hashes: List[str], report: dict) -> None:
+    now = datetime.utcnow()
+    rows = [
+        {
+            "userid": str(uuid.uuid4()),
+            "username": user_data.username,
+            "email": user_data.email,
+            "password": hashed_password,
+            "role": user_data.role,
+            "account_status": AccountStatus.ACTIVE,
+            "created_at": now,
+        }
+        for (_, user_data), hashed_password in zip(valid, hashes)
+    ]
+    if not rows:
+        return
+    created = []
+    try:
+        db.execute(insert(User), rows)
+        _record_created(db, rows)
+        db.commit()
+        created = rows
+        for (row_number, user_data), row in zip(valid, rows):
+            _add_result(report, "created", row_number, user_data.username, userid=row["userid"])
+    except IntegrityError:
+        # Another writer took a name since the conflict check; fall back to row-by-row
+        db.rollback()
+        for (row_number, user_data), row in zip(valid, rows):
+            try:
+                with db.begin_nested():
+                    db.execute(insert(User), [row])
+                created.append(row)
+                _add_result(report, "created", row_number, user_data.username, userid=row["userid"])
+            except IntegrityError:
+                _add_result(report, "conflict", row_number, user_data.username, detail="Username or email already exists")
+        _record_created(db, created)
+        db.commit()
+
+    for row in created:
+        search_index.add(row["userid"], row["username"], row["email"])
+    invalidate_user_stats()
+
+def _record_created(db: Session, rows: List[dict]) -> None:
+    """Count created users in the statistics summary, in the transaction that inserts them"""
+    for key, count in Counter((row["role"], row["account_status"]) for row in rows).items():
+        record_user_change(db, None, key, count)
+
+def _add_result(report: dict, status: str, row_number: int, username, userid: str = None, detail: str = None) -> None:
+    report["conflicts" if status == "conflict" else status] += 1
+    report["results"].append(
+        {"row": row_number, "status": status, "username": username, "userid": userid, "detail": detail}
+    )
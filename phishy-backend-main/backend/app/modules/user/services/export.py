@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Iterator
+from sqlalchemy import select
+from app.core.database import SessionLocal
+from app.modules.user.models.user import User
+from app.modules.game.models.game import GameScore
+from app.modules.game.models.assessment import AssessmentSession, AssessmentResult
+from app.utils.logger import get_logger
+import os
+
+logger = get_logger("export.py")
+
+# Rows fetched per server-side cursor batch, and bytes buffered per streamed chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Exported columns per dataset; passwords are never exported
+EXPORTS = {
+    "users": lambda: select(
+        User.userid, User.username, User.email, User.role, User.account_status,
+        User.created_at, User.last_login
+    ).order_by(User.created_at, User.userid),
+    "scores": lambda: select(
+        GameScore.id, GameScore.user_id, User.username, GameScore.score, GameScore.level,
+        GameScore.enemies_defeated, GameScore.chests_collected, GameScore.time_taken, GameScore.created_at
+    ).join(User, User.userid == GameScore.user_id).order_by(GameScore.created_at, GameScore.id),
+    "assessments": lambda: select(
+        AssessmentResult.id, AssessmentResult.session_id, AssessmentSession.user_id,
+        AssessmentResult.question_id, AssessmentResult.user_answer, AssessmentResult.correct_answer,
+        AssessmentResult.is_correct, AssessmentResult.topic, AssessmentResult.subcategory,
+        AssessmentResult.timestamp, AssessmentResult.created_at
+    ).join(AssessmentSession, AssessmentSession.session_id == AssessmentResult.session_id)
+     .order_by(AssessmentResult.created_at, AssessmentResult.id),
+}
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _encode_rows(rows, columns, fmt: str) -> Iterator[str]:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([_plain(value) for value in row])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for row in rows:
+            yield json.dumps({column: _plain(value) for column, value in zip(columns, row)}) + "\n"
+
+def stream_export(dataset: str, fmt: str, compress: bool) -> Iterator[bytes]:
+    """Stream a dataset as CSV or NDJSON bytes, optionally gzipped, with flat memory use.
+
+    Opens its own session because the response body is produced after the request handler returns.
+    """
+    logger.info(f"Exporting {dataset} as {fmt}{' (gzip)' if compress else ''}")
+    db = SessionLocal()
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    try:
+        result = db.execute(EXPORTS[dataset]().execution_options(yield_per=EXPORT_BATCH_SIZE))
+        pending = []
+        pending_size = 0
+        for text in _encode_rows(result, list(result.keys()), fmt):
+            pending.append(text)
+            pending_size += len(text)
+            if pending_size >= EXPORT_CHUNK_BYTES:
+                data = "".join(pending).encode()
+                yield compressor.compress(data) if compressor else data
+                pending = []
+                pending_size = 0
+        data = "".join(pending).encode()
+        if compressor:
+            yield compressor.compress(data) + compressor.flush()
+        elif data:
+            yield data
+    finally:
+        db.close()
@@ -0,0 +1,235 @@
+import asyncio
+import bisect
+import threading
+import time
+from typing import List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.modules.user.models.user import User
+from app.utils.logger import get_logger
+from app.utils.metrics import register_metrics
+import os
+
+logger = get_logger("search_index.py")
+
+# "database" uses trigram-indexed LIKE queries (PostgreSQL); "memory" uses UserSearchIndex.
+# "auto" picks database on PostgreSQL and memory everywhere else.
+USER_SEARCH_BACKEND = os.getenv("USER_SEARCH_BACKEND", "auto")
+# How often each worker reloads its in-memory index in the background to pick up other workers' changes
+USER_SEARCH_REFRESH_SECONDS = float(os.getenv("USER_SEARCH_REFRESH_SECONDS", "300"))
+USER_SEARCH_MAX_LIMIT = 100
+
+# Ranking tiers, best first
+EXACT, USERNAME_PREFIX, EMAIL_PREFIX, USERNAME_SUBSTRING, EMAIL_SUBSTRING = range(5)
+
+
+class UserSearchIndex:
+    """Sorted in-memory index of lower-cased usernames and emails for prefix and substring search"""
+
+    def __init__(self):
+        self._entries: List[Tuple[str, int, str]] = []  # (value, tier if prefix, userid), sorted
+        self._users = {}  # userid -> (username, email), lower-cased
+        self._haystack = ""
+        self._offsets: List[int] = []
+        self._ids: List[str] = []
+        self._dirty = False
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.searches = 0
+        self.reload_errors = 0
+
+    def load(self, db: Session) -> None:
+        """Rebuild the index from the users table"""
+        users = {
+            userid: (username.lower(), email.lower())
+            for userid, username, email in db.query(User.userid, User.username, User.email)
+        }
+        entries = sorted(
+            entry for userid, (username, email) in users.items()
+            for entry in ((username, USERNAME_PREFIX, userid), (email, EMAIL_PREFIX, userid))
+        )
+        with self._lock:
+            self._users = users
+            self._entries = entries
+            self._dirty = True
+            self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(users)} users into the search index")
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def add(self, userid: str, username: str, email: str) -> None:
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove_locked(userid)
+            username, email = username.lower(), email.lower()
+            self._users[userid] = (username, email)
+            bisect.insort(self._entries, (username, USERNAME_PREFIX, userid))
+            bisect.insort(self._entries, (email, EMAIL_PREFIX, userid))
+            self._dirty = True
+
+    def remove(self, userid: str) -> None:
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove_locked(userid)
+            self._dirty = True
+
+    def _remove_locked(self, userid: str) -> None:
+        existing = self._users.pop(userid, None)
+        if existing is None:
+            return
+        for entry in ((existing[0], USERNAME_PREFIX, userid), (existing[1], EMAIL_PREFIX, userid)):
+            position = bisect.bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def _rebuild_haystack(self) -> None:
+        # One string of "username\x01email\x00" records, so substring search is a str.find loop
+        offsets, ids, parts = [], [], []
+        position = 0
+        for userid, (username, email) in self._users.items():
+            offsets.append(position)
+            ids.append(userid)
+            record = f"{username}\x01{email}\x00"
+            parts.append(record)
+            position += len(record)
+        self._haystack = "".join(parts)
+        self._offsets = offsets
+        self._ids = ids
+        self._dirty = False
+
+    def search(self, query: str, limit: int) -> List[str]:
+        """Return up to limit user IDs ranked by exact, prefix, then substring matches.
+
+        Every match of a tier is collected before truncating, since ties within a tier are ordered
+        by username, so the order matches the database search.
+        """
+        query = query.lower()
+        ranks = {}
+        with self._lock:
+            self.searches += 1
+            # Prefix matches are a contiguous run of the sorted entries; take all of it, since an
+            # email prefix can come before a username prefix in sort order
+            position = bisect.bisect_left(self._entries, (query,))
+            while position < len(self._entries):
+                value, tier, userid = self._entries[position]
+                if not value.startswith(query):
+                    break
+                tier = EXACT if value == query and tier == USERNAME_PREFIX else tier
+                ranks[userid] = min(tier, ranks.get(userid, tier))
+                position += 1
+
+            if len(ranks) < limit:
+                if self._dirty:
+                    self._rebuild_haystack()
+                found = self._haystack.find(query)
+                while found != -1:
+                    index = bisect.bisect_right(self._offsets, found) - 1
+                    userid = self._ids[index]
+                    username = self._users[userid][0]
+                    tier = USERNAME_SUBSTRING if found < self._offsets[index] + len(username) else EMAIL_SUBSTRING
+                    # A record's first match is in the username if it has one there
+                    ranks.setdefault(userid, tier)
+                    found = self._haystack.find(query, found + 1)
+
+            users = self._users
+            ranked = sorted(ranks, key=lambda userid: (ranks[userid], len(users[userid][0]), users[userid][0]))
+            return ranked[:limit]
+
+    def _reload(self) -> None:
+        db = SessionLocal()
+        try:
+            self.load(db)
+        except Exception as e:
+            self.reload_errors += 1
+            logger.error(f"Failed to reload the user search index: {e}")
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(USER_SEARCH_REFRESH_SECONDS)
+            # Searches keep using the current index while the new one is built
+            await run_in_threadpool(self._reload)
+
+    def start(self) -> None:
+        """Start the periodic reload task if the in-memory index is in use; call from a startup handler"""
+        if self.loaded and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"users": len(self._users), "searches": self.searches, "reload_errors": self.reload_errors}
+
+
+search_index = UserSearchIndex()
+register_metrics("user_search_index", search_index.stats)
+
+def _use_database(db: Session) -> bool:
+    if USER_SEARCH_BACKEND == "auto":
+        return db.bind.dialect.name == "postgresql"
+    return USER_SEARCH_BACKEND == "database"
+
+def init_user_search(db: Session) -> None:
+    """Create the trigram indexes on PostgreSQL, or warm the in-memory index otherwise"""
+    if not _use_database(db):
+        search_index.load(db)
+        return
+    try:
+        db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_users_username_trgm ON users USING gin (lower(username) gin_trgm_ops)"))
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (lower(email) gin_trgm_ops)"))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Could not create trigram search indexes, search will scan users: {e}")
+
+def search_users(db: Session, query: str, limit: int = 20) -> List[User]:
+    """Case-insensitive prefix and substring search over usernames and emails, best matches first"""
+    query = query.strip()
+    limit = min(max(1, limit), USER_SEARCH_MAX_LIMIT)
+    if not query:
+        return []
+    if _use_database(db):
+        return _search_database(db, query, limit)
+
+    if not search_index.loaded:
+        # Warmed at startup; this only runs if that failed
+        search_index.load(db)
+    userids = search_index.search(query, limit)
+    users = {user.userid: user for user in db.query(User).filter(User.userid.in_(userids))}
+    return [users[userid] for userid in userids if userid in users]
+
+def _search_database(db: Session, query: str, limit: int) -> List[User]:
+    lowered = query.lower()
+    pattern = "%" + lowered.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    prefix = pattern[1:]
+    username, email = func.lower(User.username), func.lower(User.email)
+    rank = case(
+        (username == lowered, EXACT),
+        (username.like(prefix, escape="\\"), USERNAME_PREFIX),
+        (email.like(prefix, escape="\\"), EMAIL_PREFIX),
+        (username.like(pattern, escape="\\"), USERNAME_SUBSTRING),
+        else_=EMAIL_SUBSTRING,
+    )
+    return (
+        db.query(User)
+        .filter(or_(username.like(pattern, escape="\\"), email.like(pattern, escape="\\")))
+        .order_by(rank, func.length(User.username), username)
+        .limit(limit)
+        .all()
+    )
@@ -1,17 +1,41 @@
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, text, tuple_
 from app.modules.user.models.user import User, UserRole, AccountStatus
-from app.modules.user.schemas.schemas import UserCreate, UserLogin, UserUpdate, UserStatsResponse
+from app.modules.user.schemas.schemas import UserCreate, UserLogin, UserUpdate
 from app.utils.logger import get_logger
-from app.utils.password import get_password_hash, verify_password
-from app.core.auth import create_access_token
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.password import get_password_hash, verify_password, get_password_hash_async, verify_password_async
+from app.core.auth import (
+    create_access_token, create_refresh_token, decode_token, get_cached_user,
+    invalidate_cached_user, revoke_token, revoke_user_tokens
+)
+from app.core.revocation import revocation_list
+from app.modules.user.services.user_stats import (
+    get_user_statistics, invalidate_user_stats, record_user_change, stats_key
+)
+from app.modules.user.services.search_index import search_index
 from datetime import datetime, timedelta
+import os
 
 logger = get_logger("user-services.py")
 
+# Page sizes for user listings
+USER_PAGE_DEFAULT_SIZE = int(os.getenv("USER_PAGE_DEFAULT_SIZE", "100"))
+USER_PAGE_MAX_SIZE = int(os.getenv("USER_PAGE_MAX_SIZE", "500"))
+
 def create_user(db: Session, user_data: UserCreate):
     logger.info("Creating User")
     hashed_password = get_password_hash(user_data.password)
+    return _insert_user(db, user_data, hashed_password)
+
+async def create_user_async(db: Session, user_data: UserCreate):
+    """Create a user, hashing the password in the process pool"""
+    logger.info("Creating User")
+    hashed_password = await get_password_hash_async(user_data.password)
+    return await run_in_threadpool(_insert_user, db, user_data, hashed_password)
+
+def _insert_user(db: Session, user_data: UserCreate, hashed_password: str):
     new_user = User(
         username=user_data.username, 
         email=user_data.email, 
@@ -19,8 +43,13 @@ def create_user(db: Session, user_data: UserCreate):
         role=user_data.role
     )
     db.add(new_user)
+    # Flush to fill in the role and status defaults before counting the user
+    db.flush()
+    record_user_change(db, None, stats_key(new_user))
     db.commit()
     db.refresh(new_user)
+    invalidate_user_stats()
+    search_index.add(new_user.userid, new_user.username, new_user.email)
     logger.info(f"User created: {new_user.username} with role: {new_user.role.value}")
     return new_user
 
@@ -29,10 +58,58 @@ def get_user(db: Session, user_id: str):
 
     return db.query(User).filter(User.userid == user_id).first()
 
-def get_all_users(db: Session):
-    logger.info("Retrieving all Users")
+def list_users_page(
+    db: Session,
+    role: UserRole | None = None,
+    status: AccountStatus | None = None,
+    last_login_after: datetime | None = None,
+    last_login_before: datetime | None = None,
+    cursor: str | None = None,
+    limit: int | None = None,
+    include_total: bool = False,
+):
+    """Get one keyset page of users ordered by (created_at, userid).
+
+    Returns (users, next_cursor, total); total is only computed when include_total is set.
+    Raises ValueError for a malformed cursor.
+    """
+    logger.info("Retrieving page of Users")
+    limit = min(max(1, limit or USER_PAGE_DEFAULT_SIZE), USER_PAGE_MAX_SIZE)
 
-    return db.query(User).all()
+    query = db.query(User)
+    if role is not None:
+        query = query.filter(User.role == role)
+    if status is not None:
+        query = query.filter(User.account_status == status)
+    if last_login_after is not None:
+        query = query.filter(User.last_login >= last_login_after)
+    if last_login_before is not None:
+        query = query.filter(User.last_login < last_login_before)
+    filtered = query
+
+    if cursor:
+        created_at, userid = decode_cursor(cursor)
+        query = query.filter(tuple_(User.created_at, User.userid) > tuple_(created_at, userid))
+    # Fetch one extra row to learn whether another page follows
+    users = query.order_by(User.created_at, User.userid).limit(limit + 1).all()
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].created_at, users[-1].userid)
+
+    total = None
+    if include_total:
+        unfiltered = role is None and status is None and last_login_after is None and last_login_before is None
+        total = _estimate_user_count(db, filtered, unfiltered)
+    return users, next_cursor, total
+
+def _estimate_user_count(db: Session, query, unfiltered: bool) -> int:
+    # PostgreSQL keeps a planner estimate of the table size, which avoids a full count
+    if unfiltered and db.bind.dialect.name == "postgresql":
+        estimate = db.execute(text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'users'")).scalar()
+        if estimate is not None and estimate >= 0:
+            return estimate
+    return query.order_by(None).count()
 
 def update_user(db: Session, user_id: str, update_data: dict):
     logger.info("Updating User")
@@ -40,10 +117,15 @@ def update_user(db: Session, user_id: str, update_data: dict):
     user = db.query(User).filter(User.userid == user_id).first()
     if not user:
         return None
+    before = stats_key(user)
     for key, value in update_data.items():
         setattr(user, key, value)
+    record_user_change(db, before, stats_key(user))
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user_id)
+    invalidate_user_stats()
+    search_index.add(user.userid, user.username, user.email)
     return user
 
 def delete_user(db: Session, user_id: str):
@@ -51,8 +133,13 @@ def delete_user(db: Session, user_id: str):
 
     user = db.query(User).filter(User.userid == user_id).first()
     if user:
+        before = stats_key(user)
         db.delete(user)
+        record_user_change(db, before, None)
         db.commit()
+        invalidate_cached_user(user_id)
+        invalidate_user_stats()
+        search_index.remove(user_id)
         return True
     return False
 
@@ -60,7 +147,7 @@ def authenticate_user(db: Session, login_data: UserLogin):
     logger.info("Authenticating User")
     
     # Find user by username
-    user = db.query(User).filter(User.username == login_data.username).first()
+    user = _get_user_by_username(db, login_data.username)
     
     if not user:
         logger.warning(f"User not found: {login_data.username}")
@@ -71,10 +158,33 @@ def authenticate_user(db: Session, login_data: UserLogin):
         logger.warning(f"Invalid password for user: {login_data.username}")
         return None
     
+    return _record_login(db, user)
+
+async def authenticate_user_async(db: Session, login_data: UserLogin):
+    """Authenticate a user, verifying the password in the process pool"""
+    logger.info("Authenticating User")
+    
+    user = await run_in_threadpool(_get_user_by_username, db, login_data.username)
+    
+    if not user:
+        logger.warning(f"User not found: {login_data.username}")
+        return None
+    
+    if not await verify_password_async(login_data.password, user.password):
+        logger.warning(f"Invalid password for user: {login_data.username}")
+        return None
+    
+    return await run_in_threadpool(_record_login, db, user)
+
+def _get_user_by_username(db: Session, username: str):
+    return db.query(User).filter(User.username == username).first()
+
+def _record_login(db: Session, user: User):
     # Update last login
     user.last_login = datetime.utcnow()
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user.userid)
     
     logger.info(f"User authenticated successfully: {user.username}")
     return user
@@ -87,6 +197,35 @@ def create_user_token(user: User):
     )
     return access_token
 
+def create_user_refresh_token(user: User):
+    """Create refresh token for user"""
+    return create_refresh_token(data={"sub": user.userid})
+
+def refresh_user_tokens(db: Session, refresh_token: str):
+    """Exchange a refresh token for a new access/refresh pair, revoking the old refresh token"""
+    claims = decode_token(refresh_token)
+    if claims is None or claims.get("type") != "refresh":
+        return None
+    if revocation_list.is_revoked(db, claims):
+        logger.warning(f"Revoked refresh token presented for user {claims.get('sub')}")
+        return None
+    
+    user = get_cached_user(db, claims["sub"])
+    if user is None or user.account_status != AccountStatus.ACTIVE:
+        return None
+    
+    revoke_token(db, claims)
+    return create_user_token(user), create_user_refresh_token(user)
+
+def logout_user(db: Session, access_claims: dict, refresh_token: str | None = None):
+    """Revoke the caller's access token and, if given, their refresh token"""
+    logger.info(f"Logging out user {access_claims.get('sub')}")
+    revoke_token(db, access_claims)
+    if refresh_token:
+        refresh_claims = decode_token(refresh_token)
+        if refresh_claims and refresh_claims.get("sub") == access_claims.get("sub"):
+            revoke_token(db, refresh_claims)
+
 # Admin service functions
 def update_user_role(db: Session, user_id: str, new_role: UserRole, admin_user: User):
     """Update user role (admin function)"""
@@ -104,9 +243,13 @@ def update_user_role(db: Session, user_id: str, new_role: UserRole, admin_user:
     if user.userid == admin_user.userid:
         raise ValueError("Users cannot change their own role")
     
+    before = stats_key(user)
     user.role = new_role
+    record_user_change(db, before, stats_key(user))
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user_id)
+    invalidate_user_stats()
     logger.info(f"User {user.username} role updated to {user.role.value}")
     return user
 
@@ -122,44 +265,18 @@ def update_user_status(db: Session, user_id: str, new_status: AccountStatus, adm
     if user.userid == admin_user.userid:
         raise ValueError("Users cannot change their own account status")
     
+    before = stats_key(user)
     user.account_status = new_status
+    record_user_change(db, before, stats_key(user))
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user_id)
+    invalidate_user_stats()
+    if new_status != AccountStatus.ACTIVE:
+        revoke_user_tokens(db, user_id)
     logger.info(f"User {user.username} status updated to {user.account_status.value}")
     return user
 
-def get_user_statistics(db: Session):
-    """Get user statistics for admin dashboard"""
-    logger.info("Retrieving user statistics")
-    
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.account_status == AccountStatus.ACTIVE).count()
-    inactive_users = db.query(User).filter(User.account_status == AccountStatus.INACTIVE).count()
-    suspended_users = db.query(User).filter(User.account_status == AccountStatus.SUSPENDED).count()
-    students = db.query(User).filter(User.role == UserRole.STUDENT).count()
-    admins = db.query(User).filter(User.role == UserRole.ADMIN).count()
-    super_admins = db.query(User).filter(User.role == UserRole.SUPER_ADMIN).count()
-    
-    return UserStatsResponse(
-        total_users=total_users,
-        active_users=active_users,
-        inactive_users=inactive_users,
-        suspended_users=suspended_users,
-        students=students,
-        admins=admins,
-        super_admins=super_admins
-    )
-
-def get_users_by_role(db: Session, role: UserRole):
-    """Get all users with a specific role"""
-    logger.info(f"Retrieving users with role: {role.value}")
-    return db.query(User).filter(User.role == role).all()
-
-def get_users_by_status(db: Session, status: AccountStatus):
-    """Get all users with a specific account status"""
-    logger.info(f"Retrieving users with status: {status.value}")
-    return db.query(User).filter(User.account_status == status).all()
-
 def admin_update_user(db: Session, user_id: str, update_data: UserUpdate, admin_user: User):
     """Admin function to update user information"""
     logger.info(f"Admin {admin_user.username} updating user {user_id}")
@@ -178,11 +295,18 @@ def admin_update_user(db: Session, user_id: str, update_data: UserUpdate, admin_
         raise ValueError("Only super-admins can create other super-admins")
     
     # Update fields
+    before = stats_key(user)
     for field, value in update_data.dict(exclude_unset=True).items():
         if value is not None:
             setattr(user, field, value)
     
+    record_user_change(db, before, stats_key(user))
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user_id)
+    invalidate_user_stats()
+    search_index.add(user.userid, user.username, user.email)
+    if update_data.account_status not in (None, AccountStatus.ACTIVE):
+        revoke_user_tokens(db, user_id)
     logger.info(f"User {user.username} updated by admin {admin_user.username}")
     return user
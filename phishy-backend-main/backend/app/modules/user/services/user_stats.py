@@ -0,0 +1,99 @@
+from collections import Counter
+from typing import Optional, Tuple
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from app.modules.user.models.user import User, UserRole, AccountStatus
+from app.modules.user.models.stats import UserStatsSummary
+from app.modules.user.schemas.schemas import UserStatsResponse
+from app.utils.cache import TTLCache
+from app.utils.logger import get_logger
+from app.utils.metrics import register_metrics
+import os
+
+logger = get_logger("user_stats.py")
+
+# "cache": one grouped query over users, cached briefly.
+# "summary": read counters from user_stats_summary, maintained on every user change.
+USER_STATS_MODE = os.getenv("USER_STATS_MODE", "cache")
+USER_STATS_CACHE_SECONDS = float(os.getenv("USER_STATS_CACHE_SECONDS", "30"))
+
+stats_cache = TTLCache(maxsize=1, ttl=USER_STATS_CACHE_SECONDS)
+register_metrics("user_stats_cache", stats_cache.stats)
+
+StatsKey = Tuple[UserRole, AccountStatus]
+
+def get_user_statistics(db: Session) -> UserStatsResponse:
+    """Get user statistics from the cache, computing them in a single query on a miss"""
+    stats = stats_cache.get("stats")
+    if stats is None:
+        if USER_STATS_MODE == "summary":
+            counts = db.query(UserStatsSummary.role, UserStatsSummary.account_status, UserStatsSummary.count).all()
+        else:
+            counts = _count_users(db)
+        stats = _to_response(counts)
+        stats_cache.set("stats", stats)
+    return stats
+
+def record_user_change(db: Session, before: Optional[StatsKey], after: Optional[StatsKey], count: int = 1) -> None:
+    """Account for users moving between (role, status) buckets in the caller's transaction.
+
+    before is None for created users and after is None for deleted ones. Call it before committing the
+    user change, so the counters commit with it, and invalidate_user_stats() once it is committed.
+    """
+    if before == after:
+        return
+    if USER_STATS_MODE == "summary":
+        if before is not None:
+            _adjust_summary(db, before, -count)
+        if after is not None:
+            _adjust_summary(db, after, count)
+
+def invalidate_user_stats() -> None:
+    """Drop the cached statistics after a committed user change"""
+    stats_cache.pop("stats")
+
+def stats_key(user: User) -> StatsKey:
+    return user.role, user.account_status
+
+def rebuild_user_stats_summary(db: Session) -> None:
+    """Recount user_stats_summary from the users table, seeding every (role, status) pair"""
+    counts = Counter({(role, status): count for role, status, count in _count_users(db)})
+    db.query(UserStatsSummary).delete()
+    for role in UserRole:
+        for status in AccountStatus:
+            db.add(UserStatsSummary(role=role, account_status=status, count=counts[(role, status)]))
+    db.commit()
+    stats_cache.pop("stats")
+    logger.info("Rebuilt user statistics summary")
+
+def init_user_stats(db: Session) -> None:
+    """Bring the summary table in line with users at startup when summary mode is on"""
+    if USER_STATS_MODE == "summary":
+        rebuild_user_stats_summary(db)
+
+def _count_users(db: Session):
+    return db.query(User.role, User.account_status, func.count()).group_by(User.role, User.account_status).all()
+
+def _adjust_summary(db: Session, key: StatsKey, delta: int) -> None:
+    role, status = key
+    db.execute(
+        update(UserStatsSummary)
+        .where(UserStatsSummary.role == role, UserStatsSummary.account_status == status)
+        .values(count=UserStatsSummary.count + delta)
+    )
+
+def _to_response(counts) -> UserStatsResponse:
+    by_role = Counter()
+    by_status = Counter()
+    for role, status, count in counts:
+        by_role[role] += count
+        by_status[status] += count
+    return UserStatsResponse(
+        total_users=sum(by_role.values()),
+        active_users=by_status[AccountStatus.ACTIVE],
+        inactive_users=by_status[AccountStatus.INACTIVE],
+        suspended_users=by_status[AccountStatus.SUSPENDED],
+        students=by_role[UserRole.STUDENT],
+        admins=by_role[UserRole.ADMIN],
+        super_admins=by_role[UserRole.SUPER_ADMIN]
+    )
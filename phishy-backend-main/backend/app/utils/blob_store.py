@@ -0,0 +1,101 @@
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Set
+
+
+class LocalBlobStore:
+    """Content-addressed blobs in a local directory, named by SHA-256 and written once"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid blob hash: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its hash; identical data is stored only once"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        try:
+            # Refresh the mtime so a concurrent garbage collection treats the blob as new
+            os.utime(path)
+            return digest
+        except FileNotFoundError:
+            # Not stored yet, or collected just now; write it
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest
+
+    @contextmanager
+    def mapped(self, digest: str) -> Iterator[bytes]:
+        """Memory-map a blob read-only for the duration of the block"""
+        with open(self._path(digest), "rb") as blob:
+            if os.fstat(blob.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+    def read(self, digest: str) -> bytes:
+        with self.mapped(digest) as mapped:
+            return mapped[:]
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def hashes(self) -> Iterator[str]:
+        for directory, directories, files in os.walk(self.root):
+            # Skips the trash directory used by collect_garbage
+            directories[:] = [name for name in directories if not name.startswith(".")]
+            for name in files:
+                if not name.startswith(".tmp-"):
+                    yield name
+
+    def collect_garbage(self, referenced: Set[str], min_age_seconds: float) -> int:
+        """Delete blobs not in referenced that are older than min_age_seconds; returns the number deleted.
+
+        The age threshold protects blobs written for rows that are not committed yet. Each candidate
+        is moved into a trash directory before its age is checked again, so a put that refreshed it
+        in the meantime either shows in that check or finds it gone and writes it again.
+        """
+        cutoff = time.time() - min_age_seconds
+        trash = os.path.join(self.root, ".trash")
+        os.makedirs(trash, exist_ok=True)
+        deleted = 0
+        for digest in list(self.hashes()):
+            if digest in referenced:
+                continue
+            path = self._path(digest)
+            try:
+                if os.stat(path).st_mtime >= cutoff:
+                    continue
+                trashed = os.path.join(trash, f"{digest}.{uuid.uuid4().hex}")
+                os.rename(path, trashed)
+            except FileNotFoundError:
+                continue
+            if os.stat(trashed).st_mtime >= cutoff:
+                # Refreshed by a put before the move; put it back
+                os.replace(trashed, path)
+                continue
+            os.unlink(trashed)
+            deleted += 1
+        return deleted
@@ -0,0 +1,26 @@
+from typing import Optional
+
+def _quality(params: list) -> float:
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+def accepts_encoding(header: Optional[str], coding: str) -> bool:
+    """Whether an Accept-Encoding header allows coding, honouring q-values (q=0 refuses it) and *"""
+    if not header:
+        return False
+    wildcard = None
+    for item in header.split(","):
+        name, *params = item.split(";")
+        name = name.strip().lower()
+        if name == coding:
+            return _quality(params) > 0
+        if name == "*":
+            wildcard = _quality(params)
+    # * only covers codings the header does not name
+    return wildcard is not None and wildcard > 0
@@ -0,0 +1,52 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+
+class PreconditionFailed(Exception):
+    """Raised when a write's If-Match ETag no longer names the stored version"""
+
+
+def weak_etag(*parts) -> str:
+    """Weak ETag from the values that identify a version of a resource (ids, updated_at, revisions)"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match / If-Match header lists etag, compared weakly"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ConditionalRequest:
+    """Dependency for conditional GETs and PUTs.
+
+    Routes compute the ETag from row metadata before serializing anything and call
+    not_modified() on reads. Writes pass if_match to their service, which compares it with
+    etag_matches() against the row it locked and raises PreconditionFailed on a mismatch.
+    """
+
+    def __init__(self, request: Request, response: Response):
+        self.if_none_match = request.headers.get("if-none-match")
+        self.if_match = request.headers.get("if-match")
+        self.response = response
+
+    def set_etag(self, etag: str) -> None:
+        self.response.headers["ETag"] = etag
+
+    def not_modified(self, etag: str) -> Optional[Response]:
+        """Set the ETag header, and return a 304 response if the client already has this version"""
+        self.set_etag(etag)
+        if etag_matches(self.if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return None
+
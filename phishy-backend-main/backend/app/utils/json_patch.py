@@ -0,0 +1,109 @@
+import copy
+from typing import Any, List
+
+
+class JsonPatchError(ValueError):
+    """Raised when a JSON Patch is malformed or cannot be applied"""
+
+
+def _parse_pointer(pointer: str) -> List[str]:
+    """Split an RFC 6901 JSON Pointer into unescaped reference tokens"""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+def _array_index(container: list, token: str, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+def _resolve(document: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(document, dict):
+            if token not in document:
+                raise JsonPatchError(f"Path not found: {token!r}")
+            document = document[token]
+        elif isinstance(document, list):
+            document = document[_array_index(document, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Cannot index into a scalar with {token!r}")
+    return document
+
+def _add(document: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_array_index(parent, tokens[-1], allow_end=True), value)
+    else:
+        raise JsonPatchError("Cannot add to a scalar")
+    return document
+
+def _remove(document: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the whole document")
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise JsonPatchError(f"Path not found: {tokens[-1]!r}")
+        return parent.pop(tokens[-1])
+    if isinstance(parent, list):
+        return parent.pop(_array_index(parent, tokens[-1], allow_end=False))
+    raise JsonPatchError("Cannot remove from a scalar")
+
+def apply_patch(document: Any, patch: List[dict], in_place: bool = False) -> Any:
+    """Apply an RFC 6902 JSON Patch and return the new document.
+
+    The input is copied first unless in_place is set (e.g. for a document just parsed from JSON).
+    """
+    if not isinstance(patch, list):
+        raise JsonPatchError("A JSON Patch must be a list of operations")
+    if not in_place:
+        document = copy.deepcopy(document)
+    for operation in patch:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise JsonPatchError(f"Invalid operation: {operation!r}")
+        op, path = operation["op"], _parse_pointer(operation["path"])
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"'{op}' requires a value")
+        if op in ("move", "copy") and "from" not in operation:
+            raise JsonPatchError(f"'{op}' requires a from path")
+
+        if op == "add":
+            document = _add(document, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(document, path)
+        elif op == "replace":
+            if not path:
+                document = copy.deepcopy(operation["value"])
+            else:
+                parent = _resolve(document, path[:-1])
+                if isinstance(parent, dict) and path[-1] in parent:
+                    parent[path[-1]] = copy.deepcopy(operation["value"])
+                elif isinstance(parent, list):
+                    parent[_array_index(parent, path[-1], allow_end=False)] = copy.deepcopy(operation["value"])
+                else:
+                    raise JsonPatchError(f"Path not found: {operation['path']!r}")
+        elif op == "move":
+            source = _parse_pointer(operation["from"])
+            if path[:len(source)] == source and path != source:
+                raise JsonPatchError("Cannot move a value into one of its children")
+            document = _add(document, path, _remove(document, source))
+        elif op == "copy":
+            value = copy.deepcopy(_resolve(document, _parse_pointer(operation["from"])))
+            document = _add(document, path, value)
+        elif op == "test":
+            if _resolve(document, path) != operation["value"]:
+                raise JsonPatchError(f"Test failed at {operation['path']!r}")
+        else:
+            raise JsonPatchError(f"Unknown operation: {op!r}")
+    return document
@@ -0,0 +1,14 @@
+from typing import Callable, Dict
+
+# Named callables returning a dict of counters, collected by /admin/metrics
+_collectors: Dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, collector: Callable[[], dict]) -> None:
+    """Register a counter source under the given name"""
+    _collectors[name] = collector
+
+
+def metrics_snapshot() -> dict:
+    """Collect the current counters from every registered source"""
+    return {name: collector() for name, collector in _collectors.items()}
@@ -1,8 +1,17 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
+from app.utils.metrics import register_metrics
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Process pool sizing for async hashing (defaults to one worker per core)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4)))
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -11,6 +20,96 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+def get_password_hashes(passwords: list) -> list:
+    """Hash a batch of passwords (one pool task per batch keeps IPC overhead low)"""
+    return [pwd_context.hash(password) for password in passwords]
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool already has its maximum number of pending jobs"""
+
+
+class PasswordHashPool:
+    """Bounded process pool that keeps bcrypt work off the request thread pool"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn avoids forking a server process that already runs threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        """Run fn in the pool, failing fast with PasswordHasherBusy when saturated"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def map_batches(self, fn, items: list, batch_size: int = 4) -> list:
+        """Run fn over small batches of items, at most one batch per worker at a time.
+
+        Bulk jobs never fail fast, and short batches let queued logins interleave with them.
+        """
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        slots = asyncio.Semaphore(self.workers)
+        loop = asyncio.get_running_loop()
+
+        async def run_batch(batch):
+            async with slots:
+                self.pending += 1
+                try:
+                    return await loop.run_in_executor(self._get_executor(), fn, batch)
+                finally:
+                    self.pending -= 1
+                    self.completed += 1
+
+        results = await asyncio.gather(*(run_batch(batch) for batch in batches))
+        return [item for batch in results for item in batch]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": min(self.pending, self.workers),
+            "queued": max(0, self.pending - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+hash_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+register_metrics("password_hash_pool", hash_pool.stats)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the hashing pool"""
+    return await hash_pool.run(verify_password, plain_password, hashed_password)
 
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the hashing pool"""
+    return await hash_pool.run(get_password_hash, password)
 
+async def get_password_hashes_async(passwords: list) -> list:
+    """Hash many passwords across every worker in the hashing pool"""
+    return await hash_pool.map_batches(get_password_hashes, passwords)
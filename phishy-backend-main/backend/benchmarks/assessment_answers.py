@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of per-answer cost in POST /game/assessment/result.
+
+Compares the session ownership check and the whole check-and-insert with the
+session owner cache against the same work with the cache emptied before every
+answer (a query on assessment_sessions each time). Sessions are spread over
+many users so the table is not trivially small. Runs against a throwaway
+SQLite database.
+
+Usage:
+    python benchmarks/assessment_answers.py [answers] [sessions]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Use a throwaway database and make the app package importable
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'benchmark.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uuid
+from datetime import datetime
+from sqlalchemy import insert
+from app.core.database import SessionLocal, init_db
+from app.modules.game.models.assessment import AssessmentSession
+from app.modules.game.services.assessment import owns_session, session_owners, submit_results
+from app.modules.user.models.user import User
+
+ANSWER = {
+    "question_id": "q1", "user_answer": "a", "correct_answer": "a", "is_correct": True,
+    "topic": "Malware", "subcategory": "Ransomware", "timestamp": "2026-01-01T10:00:00Z",
+}
+
+def seed(sessions: int):
+    """Create users with open sessions; returns (session_id, user_id) pairs"""
+    db = SessionLocal()
+    now = datetime.utcnow()
+    users = [{"userid": str(uuid.uuid4()), "username": f"bench{i}", "email": f"bench{i}@phishy.com",
+              "password": "x", "created_at": now} for i in range(max(1, sessions // 10))]
+    db.execute(insert(User), users)
+    rows = [{"id": str(uuid.uuid4()), "session_id": str(uuid.uuid4()), "user_id": users[i % len(users)]["userid"],
+             "topic": "Malware", "start_time": now, "completed": False, "created_at": now, "updated_at": now}
+            for i in range(sessions)]
+    db.execute(insert(AssessmentSession), rows)
+    db.commit()
+    db.close()
+    return [(row["session_id"], row["user_id"]) for row in rows]
+
+def run(pairs, answers: int, cached: bool, insert_answer: bool) -> float:
+    """Mean microseconds per answer"""
+    db = SessionLocal()
+    session_owners.clear()
+    start = time.perf_counter()
+    for i in range(answers):
+        session_id, user_id = pairs[i % 100]
+        if not cached:
+            session_owners.clear()
+        if not owns_session(db, session_id, user_id):
+            raise RuntimeError("ownership check failed")
+        if insert_answer:
+            submit_results(db, session_id, user_id, [ANSWER])
+        else:
+            db.rollback()
+    elapsed = time.perf_counter() - start
+    db.close()
+    return elapsed / answers * 1e6
+
+def main():
+    answers = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    init_db()
+    pairs = seed(sessions)
+
+    print(f"Per answer over {answers} answers, {sessions} sessions")
+    for label, insert_answer in (("ownership check only", False), ("check + insert + commit", True)):
+        uncached = run(pairs, answers, cached=False, insert_answer=insert_answer)
+        cached = run(pairs, answers, cached=True, insert_answer=insert_answer)
+        print(f"  {label}")
+        print(f"    query on every answer: {uncached:8.1f} us")
+        print(f"    session owner cache:   {cached:8.1f} us")
+        print(f"    saved per answer:      {uncached - cached:8.1f} us")
+
+if __name__ == "__main__":
+    main()
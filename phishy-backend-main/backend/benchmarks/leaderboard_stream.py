@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Load test of the live leaderboard stream (GET /game/scores/stream).
+
+Starts the app under uvicorn, opens many idle Server-Sent Events subscribers,
+then saves scores over HTTP. Reports how long the subscribers took to connect,
+how long a top-N change took to reach every subscriber (p50/p99/max), that a
+score outside the top-N pushes nothing, and the process memory held per
+subscriber. Runs against a throwaway SQLite database.
+
+Usage:
+    python benchmarks/leaderboard_stream.py [subscribers] [top_changing_scores]
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+# Use a throwaway database and make the app package importable
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'benchmark.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from app.main import app
+from app.core.database import SessionLocal, init_db
+from app.modules.game.services.scores import leaderboard_stream
+from app.modules.user.models.user import UserRole
+from app.modules.user.schemas.schemas import UserCreate
+from app.modules.user.services.services import create_user
+
+def rss_kib() -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def subscriber(client: httpx.AsyncClient, url: str, ready: asyncio.Event, received: list, counter: list):
+    async with client.stream("GET", url) as response:
+        async for line in response.aiter_lines():
+            if line == "event: snapshot":
+                counter[0] += 1
+                if counter[0] == counter[1]:
+                    ready.set()
+            elif line == "event: diff":
+                received.append(time.perf_counter())
+
+async def run(subscribers: int, changes: int, base: str, headers: dict):
+    limits = httpx.Limits(max_connections=subscribers + 10, max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=base, timeout=None, limits=limits) as client:
+        rss_before = rss_kib()
+        ready = asyncio.Event()
+        counter = [0, subscribers]
+        received = [[] for _ in range(subscribers)]
+        start = time.perf_counter()
+        tasks = [
+            asyncio.create_task(subscriber(client, "/game/scores/stream", ready, received[i], counter))
+            for i in range(subscribers)
+        ]
+        await asyncio.wait_for(ready.wait(), 120)
+        print(f"Connected {subscribers} subscribers in {time.perf_counter() - start:.2f}s")
+        print(f"  RSS per subscriber (server and client): {(rss_kib() - rss_before) / subscribers:.1f} KiB")
+
+        latencies = []
+        for i in range(changes):
+            sent = time.perf_counter()
+            response = await client.post(
+                "/game/scores/", json={"score": 1000 + i, "level": 1, "time_taken": 1.0}, headers=headers
+            )
+            response.raise_for_status()
+            deadline = time.perf_counter() + 30
+            while any(len(times) <= i for times in received) and time.perf_counter() < deadline:
+                await asyncio.sleep(0.001)
+            latencies.extend(times[i] - sent for times in received if len(times) > i)
+        delivered = len(latencies)
+        print(f"Top-N changes: {changes}, diffs delivered {delivered}/{changes * subscribers}")
+        print(f"  fan-out latency p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms")
+
+        before = sum(len(times) for times in received)
+        response = await client.post("/game/scores/", json={"score": 1, "level": 1, "time_taken": 1.0}, headers=headers)
+        response.raise_for_status()
+        await asyncio.sleep(0.5)
+        print(f"Score outside the top-N: {sum(len(times) for times in received) - before} diffs pushed")
+        print(f"Broadcaster: {leaderboard_stream.stats()}")
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+def main():
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    init_db()
+    db = SessionLocal()
+    create_user(db, UserCreate(username="bench", email="bench@example.com", password="bench123", role=UserRole.STUDENT))
+    db.close()
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base = f"http://127.0.0.1:{port}"
+    token = httpx.post(f"{base}/users/login", json={"username": "bench", "password": "bench123"}).json()["access_token"]
+    # Fill the top-N so later scores change it
+    for score in range(10):
+        httpx.post(f"{base}/game/scores/", json={"score": score, "level": 1, "time_taken": 1.0},
+                   headers={"Authorization": f"Bearer {token}"}).raise_for_status()
+
+    try:
+        asyncio.run(run(subscribers, changes, base, {"Authorization": f"Bearer {token}"}))
+    finally:
+        server.should_exit = True
+        thread.join(10)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark of concurrent game progress saves (POST /game/progress/).
+
+Compares the previous read-then-write path (SELECT, UPDATE or INSERT, COMMIT,
+refresh SELECT) against the single INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+upsert. Several threads save progress for the same users at once, so the first
+save of each user races. Reports SQL statements per save, throughput, and saves
+that failed because two requests both tried to create the row.
+Runs against a throwaway SQLite database.
+
+Usage:
+    python benchmarks/progress_upsert.py [users] [saves_per_user] [threads]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Use a throwaway database and make the app package importable
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'benchmark.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from app.core.database import SessionLocal, engine, init_db
+from app.modules.game.models.game import GameProgress
+from app.modules.game.services.progress import save_progress
+from app.modules.user.models.user import User
+
+statements = 0
+_count_lock = threading.Lock()
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    with _count_lock:
+        statements += 1
+
+def legacy_save(db, user_id: str, values: dict) -> None:
+    """The previous create_game_progress body"""
+    existing = db.query(GameProgress).filter(GameProgress.user_id == user_id).first()
+    if existing:
+        for field, value in values.items():
+            setattr(existing, field, value)
+        existing.updated_at = datetime.utcnow()
+        db.commit()
+        db.refresh(existing)
+    else:
+        new_progress = GameProgress(user_id=user_id, **values)
+        db.add(new_progress)
+        db.commit()
+        db.refresh(new_progress)
+
+def upsert_save(db, user_id: str, values: dict) -> None:
+    save_progress(db, user_id, values, values)
+
+def run(save, user_ids: list, saves_per_user: int, threads: int) -> tuple:
+    """Return (statements per save, saves per second, failed saves)"""
+    global statements
+    failures = 0
+
+    def worker(user_id: str, step: int) -> int:
+        db = SessionLocal()
+        try:
+            save(db, user_id, {"level": step, "current_score": step * 10, "save_data": "x" * 2048})
+            return 0
+        except IntegrityError:
+            db.rollback()
+            return 1
+        finally:
+            db.close()
+
+    jobs = [(user_id, step) for step in range(saves_per_user) for user_id in user_ids]
+    statements = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        failures = sum(pool.map(lambda job: worker(*job), jobs))
+    elapsed = time.perf_counter() - start
+    return statements / len(jobs), len(jobs) / elapsed, failures
+
+def make_users(prefix: str, count: int) -> list:
+    db = SessionLocal()
+    users = [User(username=f"{prefix}{i}", email=f"{prefix}{i}@phishy.com", password="x") for i in range(count)]
+    db.add_all(users)
+    db.commit()
+    user_ids = [user.userid for user in users]
+    db.close()
+    return user_ids
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    saves_per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    init_db()
+    print(f"{users} users x {saves_per_user} saves across {threads} threads")
+    for name, save in (("select + write", legacy_save), ("upsert", upsert_save)):
+        per_save, throughput, failures = run(save, make_users(name[0], users), saves_per_user, threads)
+        print(f"  {name:<15} {per_save:5.2f} statements/save   {throughput:8.1f} saves/s   {failures} failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the server-side question bank.
+
+Measures quiz fetches through GET /game/assessment/questions?topic= (first
+fetch with gzip, and revalidation answered with 304), against serializing the
+same questions on every request, and grading throughput: bank lookups alone
+and a whole quiz graded and stored through one POST
+/game/assessment/{session_id}/results. Runs against a throwaway SQLite
+database and the bundled question bank.
+
+Usage:
+    python benchmarks/question_bank.py [iterations]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Use a throwaway database and make the app package importable
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'benchmark.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.database import SessionLocal
+from app.modules.game.services.question_bank import question_bank
+from app.modules.learning_path.models.learn_path import Topics
+from app.modules.user.models.user import UserRole
+from app.modules.user.schemas.schemas import UserCreate
+from app.modules.user.services.services import create_user
+
+TOPIC = Topics.SE_T
+
+def per_second(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    logging.disable(logging.INFO)
+
+    with TestClient(app) as client:
+        db = SessionLocal()
+        create_user(db, UserCreate(username="bench", email="bench@phishy.com", password="bench123", role=UserRole.STUDENT))
+        db.close()
+        token = client.post("/users/login", json={"username": "bench", "password": "bench123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"}
+        url = f"/game/assessment/questions?topic={TOPIC.value}"
+
+        first = client.get(url, headers=headers)
+        etag = first.headers["etag"]
+        questions = [question_bank.get(q["question_id"]) for q in first.json()["questions"]]
+
+        def serialize_per_request():
+            json.dumps({"questions": [
+                {"question_id": q.question_id, "topic": q.topic.value, "subcategory": q.subcategory,
+                 "question": q.question, "choices": list(q.choices)}
+                for q in questions
+            ]}).encode()
+
+        body = question_bank.body(TOPIC)
+        print(f"Quiz fetch, topic {TOPIC.value!r} ({len(questions)} questions, {len(body.body)} bytes, {len(body.gzipped)} gzipped)")
+        print(f"  full fetch (precompressed):  {per_second(lambda: client.get(url, headers=headers), iterations):10.0f} req/s")
+        revalidate = {**headers, "If-None-Match": etag}
+        print(f"  revalidation (304):          {per_second(lambda: client.get(url, headers=revalidate), iterations):10.0f} req/s")
+        print(f"  serializing per request:     {per_second(serialize_per_request, iterations * 10):10.0f} bodies/s (no HTTP)")
+        print(f"  precomputed body lookup:     {per_second(lambda: question_bank.body(TOPIC), iterations * 10):10.0f} bodies/s (no HTTP)")
+
+        answers = [(q.question_id, q.choices[i % len(q.choices)]) for i, q in enumerate(questions)]
+        def grade_quiz():
+            for question_id, answer in answers:
+                question_bank.grade(question_id, answer)
+        print("Grading")
+        print(f"  bank lookups:                {per_second(grade_quiz, iterations * 10) * len(answers):10.0f} answers/s")
+
+        session_id = client.post("/game/assessment/start", json={"topic": TOPIC.value, "start_time": "2026-01-01T10:00:00Z"},
+                                 headers=headers).json()["session_id"]
+        batch = {"results": [
+            {"question_id": question_id, "user_answer": answer, "topic": TOPIC.value,
+             "subcategory": question_bank.get(question_id).subcategory, "timestamp": "2026-01-01T10:00:00Z"}
+            for question_id, answer in answers
+        ]}
+        def submit_quiz():
+            client.post(f"/game/assessment/{session_id}/results", json=batch, headers=headers).raise_for_status()
+        quizzes = per_second(submit_quiz, max(1, iterations // 10))
+        print(f"  graded quiz submissions:     {quizzes:10.0f} quizzes/s ({quizzes * len(answers):.0f} answers/s, one request each)")
+
+if __name__ == "__main__":
+    main()
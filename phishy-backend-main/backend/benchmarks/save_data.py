@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark of compressed, delta-encoded game save data.
+
+Builds a synthetic game state and reports stored size per compression level,
+request bytes for a full save vs a JSON Patch autosave, response bytes for a
+plain vs deflate read of /game/progress/save, and CPU time to compress,
+decompress and apply a patch.
+
+Usage:
+    python benchmarks/save_data.py [iterations]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+
+# Use a throwaway database and make the app package importable
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'benchmark.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.modules.game.services.progress import apply_progress_changes
+from app.modules.game.services.save_data import decode_save, deflate_save, encode_save
+
+def make_state() -> dict:
+    random.seed(7)
+    return {
+        "player": {"x": 412, "y": 96, "hp": 80, "level": 3},
+        "tiles": [[random.choice([0, 0, 0, 1, 2]) for _ in range(64)] for _ in range(64)],
+        "inventory": [{"item": f"item_{i}", "count": random.randint(1, 9)} for i in range(40)],
+        "quests": {f"quest_{i}": {"done": random.random() < 0.5, "step": random.randint(0, 5)} for i in range(60)},
+        "enemies": [{"id": i, "x": random.randint(0, 2048), "y": random.randint(0, 2048), "alive": True} for i in range(120)],
+    }
+
+AUTOSAVE_PATCH = [
+    {"op": "replace", "path": "/player/x", "value": 436},
+    {"op": "replace", "path": "/player/hp", "value": 72},
+    {"op": "replace", "path": "/enemies/17/alive", "value": False},
+    {"op": "add", "path": "/inventory/-", "value": {"item": "phish_net", "count": 1}},
+]
+
+def timed(fn, iterations: int) -> float:
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    text = json.dumps(make_state())
+    blob = encode_save(text)
+
+    print("Storage per save")
+    print(f"  uncompressed text:     {len(text):8d} bytes")
+    for level in (1, 6, 9):
+        print(f"  zlib level {level}:          {len(zlib.compress(text.encode(), level)) + 1:8d} bytes")
+
+    patch_body = json.dumps({"save_patch": AUTOSAVE_PATCH, "base_revision": 1})
+    full_body = json.dumps({"save_data": text})
+    print("Bandwidth")
+    print(f"  full save request:     {len(full_body):8d} bytes")
+    print(f"  patch save request:    {len(patch_body):8d} bytes")
+    print(f"  plain read response:   {len(text):8d} bytes")
+    print(f"  deflate read response: {len(deflate_save(blob, None)):8d} bytes")
+
+    def patch_save():
+        state = {"save_blob": blob, "save_data": None, "save_revision": 1}
+        apply_progress_changes(state, {"save_patch": AUTOSAVE_PATCH, "base_revision": 1})
+
+    print(f"CPU ({iterations} iterations)")
+    print(f"  compress:                 {timed(lambda: encode_save(text), iterations):8.1f} us")
+    print(f"  decompress:               {timed(lambda: decode_save(blob), iterations):8.1f} us")
+    print(f"  apply patch + recompress: {timed(patch_save, iterations):8.1f} us")
+
+if __name__ == "__main__":
+    main()
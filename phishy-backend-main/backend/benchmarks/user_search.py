@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark of the admin user search (GET /admin/users/search).
+
+Seeds a throwaway SQLite database with synthetic users, warms the in-memory
+search index and reports p50/p99 latency of search_users for prefix and
+substring queries, including the fetch of the matched rows.
+
+Usage:
+    python benchmarks/user_search.py [users] [queries]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+# Use a throwaway database and make the app package importable
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'benchmark.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from app.core.database import SessionLocal, init_db
+from app.modules.user.models.user import User, UserRole, AccountStatus
+from app.modules.user.services.search_index import init_user_search, search_users
+
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet"]
+DOMAINS = ["phishy.com", "school.edu", "example.org"]
+
+def seed(db, count: int) -> None:
+    now = datetime.utcnow()
+    for start in range(0, count, 5000):
+        db.execute(insert(User), [
+            {
+                "userid": str(uuid.uuid4()),
+                "username": f"{random.choice(WORDS)}{random.choice(WORDS)}{i}",
+                "email": f"user{i}@{random.choice(DOMAINS)}",
+                "password": "x",
+                "role": UserRole.STUDENT,
+                "account_status": AccountStatus.ACTIVE,
+                "created_at": now,
+            }
+            for i in range(start, min(start + 5000, count))
+        ])
+    db.commit()
+
+def measure(db, queries: list) -> tuple:
+    """Return (p50, p99) milliseconds per search"""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search_users(db, query, 20)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    init_db()
+    db = SessionLocal()
+    seed(db, users)
+    init_user_search(db)
+
+    prefixes = [random.choice(WORDS)[:random.randint(1, 4)] for _ in range(count)]
+    substrings = [random.choice(["avo", "lie", "tel", "432", "@school", "ltae", "zzz"]) for _ in range(count)]
+    print(f"search_users over {users} users, {count} queries each")
+    for name, queries in (("prefix", prefixes), ("substring", substrings)):
+        p50, p99 = measure(db, queries)
+        print(f"  {name:<10} p50 {p50:6.2f} ms   p99 {p99:6.2f} ms")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Script to provision many users at once (e.g. a whole school) for the Phishy Backend system.
+Reads a CSV file with a header row (username,email,password[,role]) or an NDJSON file
+with one user object per line, streaming it in chunks.
+
+Usage:
+    python bulk_create_users.py students.csv
+    python bulk_create_users.py students.ndjson --format ndjson
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.core.database import get_db, init_db
+from app.modules.user.services.bulk_provisioning import bulk_create_users, iter_file_lines
+from app.utils.password import hash_pool
+
+def provision_users(path: str, fmt: str):
+    """Create every user listed in the file and print a per-row report"""
+    print("Bulk Provisioning Users for Phishy Backend")
+    print("=" * 50)
+    
+    # Initialize database
+    init_db()
+    
+    # Get database session
+    db = next(get_db())
+    
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as upload:
+            report = asyncio.run(bulk_create_users(db, iter_file_lines(upload), fmt))
+        
+        for result in report["results"]:
+            if result["status"] != "created":
+                print(f"Row {result['row']} ({result['username']}): {result['status']} - {result['detail']}")
+        
+        print("\n" + "=" * 50)
+        print(f"Created:   {report['created']}")
+        print(f"Conflicts: {report['conflicts']}")
+        print(f"Invalid:   {report['invalid']}")
+        print("=" * 50)
+        
+    except Exception as e:
+        print(f"Error provisioning users: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+        hash_pool.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk create users from a CSV or NDJSON file")
+    parser.add_argument("path", help="CSV (with header row) or NDJSON file of users")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="defaults to the file extension")
+    args = parser.parse_args()
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    provision_users(args.path, fmt)
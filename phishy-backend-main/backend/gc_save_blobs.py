@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Script to delete save snapshots in the save blob store that no progress row references.
+Only blobs older than SAVE_BLOB_GC_MIN_AGE_SECONDS are removed, so saves in flight are kept.
+Also runs automatically at server startup.
+
+Usage:
+    SAVE_BLOB_STORE=local python gc_save_blobs.py
+"""
+
+import sys
+import os
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.core.database import get_db, init_db
+from app.modules.game.services.save_data import SAVE_BLOB_STORE, collect_save_blobs
+
+def collect_garbage():
+    """Remove unreferenced save blobs and print how many were deleted"""
+    print("Collecting Unreferenced Save Blobs for Phishy Backend")
+    print("=" * 50)
+    
+    if SAVE_BLOB_STORE != "local":
+        print("SAVE_BLOB_STORE is not set to 'local'; nothing to collect")
+        return
+    
+    # Initialize database
+    init_db()
+    
+    # Get database session
+    db = next(get_db())
+    
+    try:
+        deleted = collect_save_blobs(db)
+        print(f"Deleted {deleted} unreferenced blobs")
+    except Exception as e:
+        print(f"Error collecting save blobs: {str(e)}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    collect_garbage()
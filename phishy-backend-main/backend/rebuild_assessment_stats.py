@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Script to check the user_assessment_stats summary table against assessment_sessions
+and assessment_results, and rebuild it when they disagree.
+
+Usage:
+    python rebuild_assessment_stats.py           # check, rebuild if out of date
+    python rebuild_assessment_stats.py --check   # only report, exit 1 if out of date
+"""
+
+import argparse
+import sys
+import os
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.core.database import get_db, init_db
+from app.modules.game.services.assessment_stats import (
+    check_user_assessment_stats, rebuild_user_assessment_stats
+)
+
+def check_and_rebuild(check_only: bool) -> bool:
+    """Compare the summary table with the raw tables; returns True if it was (or now is) consistent"""
+    print("Checking Assessment Statistics for Phishy Backend")
+    print("=" * 50)
+
+    # Initialize database
+    init_db()
+
+    # Get database session
+    db = next(get_db())
+
+    try:
+        mismatched = check_user_assessment_stats(db)
+        if not mismatched:
+            print("user_assessment_stats is consistent")
+            return True
+
+        print(f"{len(mismatched)} users have out-of-date stats")
+        for user_id in mismatched[:20]:
+            print(f"  {user_id}")
+        if len(mismatched) > 20:
+            print(f"  ... and {len(mismatched) - 20} more")
+        if check_only:
+            return False
+
+        rows = rebuild_user_assessment_stats(db)
+        print(f"Rebuilt stats for {rows} users")
+        return True
+
+    except Exception as e:
+        print(f"Error checking assessment stats: {str(e)}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and rebuild the user_assessment_stats summary table")
+    parser.add_argument("--check", action="store_true", help="only report differences, do not rebuild")
+    args = parser.parse_args()
+    sys.exit(0 if check_and_rebuild(args.check) else 1)